@@ -24,8 +24,6 @@ from open_turb_arch.architecting.metrics import *
 from open_turb_arch.architecting.turbofan import *
 from open_turb_arch.evaluation.analysis import *
 
-from open_turb_arch.architecting.pymoo import *
-
 
 def get_architecting_problem():
     analysis_problem = AnalysisProblem(
@@ -77,6 +75,8 @@ def get_architecting_problem():
 
 
 def get_pymoo_architecting_problem(architecting_problem: ArchitectingProblem):
+    # Imported here so that the architecting problem itself can be used without importing pymoo
+    from open_turb_arch.architecting.pymoo import PymooArchitectingProblem
     prob = PymooArchitectingProblem(architecting_problem)
 
     path = os.path.join(os.path.dirname(__file__), 'architecting_problem_pf.json')
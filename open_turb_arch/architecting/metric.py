@@ -45,3 +45,17 @@ class ArchitectingMetric:
 
     def extract_con(self, analysis_problem: AnalysisProblem, result: OperatingMetricsMap, architecture: TurbofanArchitecture) -> Sequence[float]:
         return self.extract_met(analysis_problem, result, architecture)
+
+    # Set to False if the extracted values only depend on the metric type and operating condition (not e.g. on a
+    # constraint limit value), so that they are only extracted once if the same metric is used in several roles
+    extract_depends_on_limits = True
+
+    def get_extract_key(self) -> Optional[Hashable]:
+        """Metrics with the same key extract the same values from a result, so that the values are only extracted once
+        if the same metric is used in several roles (objective, constraint, metric). None means that values are always
+        extracted."""
+        cls = type(self)
+        if self.extract_depends_on_limits or cls.extract_obj is not ArchitectingMetric.extract_obj or \
+                cls.extract_con is not ArchitectingMetric.extract_con:
+            return None
+        return cls, id(getattr(self, 'condition', None))
@@ -28,6 +28,8 @@ __all__ = ['DiameterMetric']
 class DiameterMetric(ArchitectingMetric):
     """Representing the maximum engine diameter as design goal or constraint."""
 
+    extract_depends_on_limits = False
+
     max_diameter: float = 4  # [m], if used as a constraint
 
     # Specify the operating condition to extract from, otherwise will take the design condition
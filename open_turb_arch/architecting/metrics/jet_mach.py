@@ -27,6 +27,8 @@ __all__ = ['JetMachMetric']
 class JetMachMetric(ArchitectingMetric):
     """Representing the jet nozzle Mach number as design goal or constraint."""
 
+    extract_depends_on_limits = False
+
     max_jet_mn: float = .95  # [-], if used as a constraint
 
     # Specify the operating condition to extract from, otherwise will take the design condition
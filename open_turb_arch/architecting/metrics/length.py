@@ -28,6 +28,8 @@ __all__ = ['LengthMetric']
 class LengthMetric(ArchitectingMetric):
     """Representing the engine length as design goal or constraint."""
 
+    extract_depends_on_limits = False
+
     max_length: float = 4  # [m], if used as a constraint
 
     # Specify the operating condition to extract from, otherwise will take the design condition
@@ -28,6 +28,8 @@ __all__ = ['NoiseMetric']
 class NoiseMetric(ArchitectingMetric):
     """Representing the engine noise as design goal or constraint."""
 
+    extract_depends_on_limits = False
+
     max_noise: float = 100  # [dB], if used as a constraint
 
     # Specify the operating condition to extract from, otherwise will take the design condition
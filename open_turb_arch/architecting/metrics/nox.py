@@ -28,6 +28,8 @@ __all__ = ['NOxMetric']
 class NOxMetric(ArchitectingMetric):
     """Representing the engine weight as design goal or constraint."""
 
+    extract_depends_on_limits = False
+
     max_NOx: float = 1  # [(gram NOx)/kN], if used as a constraint
 
     # Specify the operating condition to extract from, otherwise will take the design condition
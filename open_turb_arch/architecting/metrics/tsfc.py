@@ -27,6 +27,8 @@ __all__ = ['TSFCMetric']
 class TSFCMetric(ArchitectingMetric):
     """Representing the TSFC as design goal or constraint."""
 
+    extract_depends_on_limits = False
+
     max_tsfc: float = .15  # [g/kN s], if used as a constraint
 
     # Specify the operating condition to extract from, otherwise will take the design condition
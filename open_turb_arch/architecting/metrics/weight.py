@@ -28,6 +28,8 @@ __all__ = ['WeightMetric']
 class WeightMetric(ArchitectingMetric):
     """Representing the engine weight as design goal or constraint."""
 
+    extract_depends_on_limits = False
+
     max_weight: float = 20000  # [kg], if used as a constraint
 
     # Specify the operating condition to extract from, otherwise will take the design condition
@@ -21,9 +21,12 @@ import pickle
 import datetime
 import numpy as np
 from typing import *
+from enum import Enum
+from dataclasses import fields, is_dataclass
 from open_turb_arch.architecting.metric import *
 from open_turb_arch.architecting.opt_defs import *
 from open_turb_arch.evaluation.analysis.builder import *
+from open_turb_arch.evaluation.analysis.balancer import DesignBalancer
 from open_turb_arch.evaluation.architecture.architecture import *
 from open_turb_arch.architecting.turbojet_architecture import get_turbojet_architecture
 
@@ -38,11 +41,17 @@ class ArchitectingProblem:
 
     Use `save_results_folder` to store evaluation results (design vector, architecture, results, etc) using pickling.
     Each result is assigned an ID (file names are results_YYYYMMDD_HHMMSS_ID.pkl), which can be requested using
-    `get_last_eval_id()`.
+    `get_last_eval_id()`. Set `results_buffer_size` to write results in batches; remaining results are written by
+    `flush_results()` or `finalize()`.
+
+    Evaluation results are cached in memory; use `save_results_cache()` and `load_results_cache()` to reuse them in a
+    later session of the same problem.
 
     If you need to pickle results containing the ArchitectingProblem, call `.finalize()` before!
     """
 
+    _results_cache_version = 2  # Stored results caches of other versions are not loaded
+
     def __init__(self, analysis_problem: AnalysisProblem, choices: List[ArchitectingChoice],
                  objectives: List[ArchitectingMetric], constraints: List[ArchitectingMetric] = None,
                  metrics: List[ArchitectingMetric] = None, max_iter=30, save_results_folder=None,
@@ -50,6 +59,7 @@ class ArchitectingProblem:
 
         self._an_problem = analysis_problem
         self.print_results = False
+        self.view_n2 = False  # Write the N2 diagram of the OpenMDAO problem (n2.html) for each evaluation
         self.verbose = False
         self._max_iter = max_iter
 
@@ -63,14 +73,29 @@ class ArchitectingProblem:
         self._opt_con: List[List[Constraint]] = None
         self._opt_met: List[List[OutputMetric]] = None
 
+        # Flattened versions of the above, and whether each design variable is free
+        self._opt_des_vars_flat: List[DesignVariable] = None
+        self._free_opt_des_vars: List[DesignVariable] = None
+        self._is_free_des_var: List[bool] = None
+        self._opt_obj_flat: List[Objective] = None
+        self._opt_con_flat: List[Constraint] = None
+        self._opt_met_flat: List[OutputMetric] = None
+        self._free_des_var_bounds: Tuple[np.ndarray, np.ndarray, np.ndarray] = None
+
         self._check_definitions()
 
         self._results_cache = {}
         self._eval_id_cache = {}
+        self._dv_imputed_cache = {}  # Design vector --> (imputed design vector, is_active)
+        self._last_generated = None  # (design vector, architecture, imputed design vector, is_active)
         self._last_eval_id = None
         self.save_results_folder = save_results_folder
         self.save_results_combined = save_results_combined
+        self.results_buffer_size = 0  # Number of results to collect before writing them to the results folder
+        self._results_buffer = []
         self._last_is_active = None
+        self._warm_start_cache = {}
+        self._problem_cache = ProblemCache()  # Set-up OpenMDAO problems, reused for the same topology
 
     @property
     def analysis_problem(self) -> AnalysisProblem:
@@ -94,33 +119,49 @@ class ArchitectingProblem:
 
     @property
     def opt_des_vars(self) -> List[DesignVariable]:
-        if self._opt_des_vars is None:
-            self._opt_des_vars = [choice.get_design_variables() for choice in self.choices]
-        return [des_var for des_vars in self._opt_des_vars for des_var in des_vars]
+        if self._opt_des_vars_flat is None:
+            if self._opt_des_vars is None:
+                self._opt_des_vars = [choice.get_design_variables() for choice in self.choices]
+            self._opt_des_vars_flat = [des_var for des_vars in self._opt_des_vars for des_var in des_vars]
+        return self._opt_des_vars_flat
 
     @property
     def free_opt_des_vars(self) -> List[DesignVariable]:
-        return [des_var for des_var in self.opt_des_vars if not des_var.is_fixed]
+        if self._free_opt_des_vars is None:
+            is_free = self._get_is_free_des_var()
+            self._free_opt_des_vars = [des_var for i, des_var in enumerate(self.opt_des_vars) if is_free[i]]
+        return self._free_opt_des_vars
+
+    def _get_is_free_des_var(self) -> List[bool]:
+        if self._is_free_des_var is None:
+            self._is_free_des_var = [not des_var.is_fixed for des_var in self.opt_des_vars]
+        return self._is_free_des_var
 
     @property
     def opt_objectives(self) -> List[Objective]:
-        if self._opt_obj is None:
-            self._opt_obj = [metric.get_opt_objectives(self.choices) for metric in self.objectives]
-        return [obj for objs in self._opt_obj for obj in objs]
+        if self._opt_obj_flat is None:
+            if self._opt_obj is None:
+                self._opt_obj = [metric.get_opt_objectives(self.choices) for metric in self.objectives]
+            self._opt_obj_flat = [obj for objs in self._opt_obj for obj in objs]
+        return self._opt_obj_flat
 
     @property
     def opt_constraints(self) -> List[Constraint]:
-        if self._opt_con is None:
-            opt_con = [metric.get_opt_constraints(self.choices) for metric in self.constraints]
-            opt_con += [con for con in [choice.get_constraints() for choice in self.choices] if con is not None]
-            self._opt_con = opt_con
-        return [con for cons in self._opt_con for con in cons]
+        if self._opt_con_flat is None:
+            if self._opt_con is None:
+                opt_con = [metric.get_opt_constraints(self.choices) for metric in self.constraints]
+                opt_con += [con for con in [choice.get_constraints() for choice in self.choices] if con is not None]
+                self._opt_con = opt_con
+            self._opt_con_flat = [con for cons in self._opt_con for con in cons]
+        return self._opt_con_flat
 
     @property
     def opt_metrics(self) -> List[OutputMetric]:
-        if self._opt_met is None:
-            self._opt_met = [metric.get_opt_metrics(self.choices) for metric in self.metrics]
-        return [met for metrics in self._opt_met for met in metrics]
+        if self._opt_met_flat is None:
+            if self._opt_met is None:
+                self._opt_met = [metric.get_opt_metrics(self.choices) for metric in self.metrics]
+            self._opt_met_flat = [met for metrics in self._opt_met for met in metrics]
+        return self._opt_met_flat
 
     def _check_definitions(self):
         if len(self.free_opt_des_vars) == 0:
@@ -158,25 +199,44 @@ class ArchitectingProblem:
 
         yield from _iter_next_dv(self.free_opt_des_vars)
 
-    def evaluate(self, design_vector: DesignVector) -> Tuple[DesignVector, List[float], List[float], List[float]]:
+    def evaluate(self, design_vector: Union[DesignVector, np.ndarray]) \
+            -> Tuple[DesignVector, List[float], List[float], List[float]]:
+        design_vector = self._get_design_vector_list(design_vector)
+
+        # Return cached evaluation results without generating the architecture if this design vector has been seen before
+        dv_key = tuple(design_vector)
+        if dv_key in self._dv_imputed_cache:
+            dv_cache, is_active = self._dv_imputed_cache[dv_key]
+            if dv_cache in self._results_cache:
+                self._last_is_active = is_active
+                self._last_eval_id = self._eval_id_cache[dv_cache]
+                return copy.copy(self._results_cache[dv_cache])
 
         # Generate architecture
         architecture, imputed_design_vector = self.generate_architecture(design_vector)
 
         # Return cached evaluation results
         dv_cache = tuple(imputed_design_vector)
+        self._dv_imputed_cache[dv_key] = dv_cache, self._last_is_active
         if dv_cache in self._results_cache:
             self._last_eval_id = self._eval_id_cache[dv_cache]
             return copy.copy(self._results_cache[dv_cache])
 
-        # Evaluate architecture
-        try:
-            results = self.evaluate_architecture(architecture)
-            obj_values, con_values, met_values = self.extract_metrics(architecture, imputed_design_vector, results)
-        except:
-            obj_values = np.zeros((len(self.opt_objectives),))*np.nan
-            con_values = np.zeros((len(self.opt_constraints),))*np.nan
-            met_values = np.zeros((len(self.opt_metrics),))*np.nan
+        # Reject the architecture without evaluating it if it does not pass the pre-filter
+        reject_reason = self.pre_filter(architecture, imputed_design_vector)
+        save_kwargs = {}
+        if reject_reason is not None:
+            obj_values, con_values, met_values = self._get_rejected_values()
+            save_kwargs['reject_reason'] = reject_reason
+
+        else:  # Evaluate architecture
+            try:
+                results = self.evaluate_architecture(architecture)
+                obj_values, con_values, met_values = self.extract_metrics(architecture, imputed_design_vector, results)
+            except:
+                obj_values = np.zeros((len(self.opt_objectives),))*np.nan
+                con_values = np.zeros((len(self.opt_constraints),))*np.nan
+                met_values = np.zeros((len(self.opt_metrics),))*np.nan
 
         cache = self._results_cache, self._eval_id_cache
         self._results_cache = self._eval_id_cache = None  # To prevent pickling the results cache
@@ -188,6 +248,7 @@ class ArchitectingProblem:
             obj_values=obj_values,
             con_values=con_values,
             met_values=met_values,
+            **save_kwargs,
         )
         self._results_cache, self._eval_id_cache = cache
 
@@ -195,6 +256,37 @@ class ArchitectingProblem:
         self._eval_id_cache[dv_cache] = self._last_eval_id = eval_id
         return copy.copy(self._results_cache[dv_cache])
 
+    def pre_filter(self, architecture: TurbofanArchitecture, imputed_design_vector: DesignVector) -> Optional[str]:
+        """Cheap check of a generated architecture before it is evaluated, for example an estimate of the geometry of
+        the engine: return a reason to reject the architecture without running the cycle analysis, or None to evaluate
+        it. Rejected architectures get the worst possible objective and constraint values."""
+        return None
+
+    def _get_rejected_values(self) -> Tuple[List[float], List[float], List[float]]:
+        obj_values = [-objective.dir.value*np.inf for objective in self.opt_objectives]
+        con_values = [-constraint.dir.value*np.inf for constraint in self.opt_constraints]
+        met_values = [np.nan for _ in self.opt_metrics]
+        return obj_values, con_values, met_values
+
+    def evaluate_many(self, design_vectors: Union[List[DesignVector], np.ndarray]) \
+            -> List[Tuple[DesignVector, List[float], List[float], List[float]]]:
+        """Evaluates multiple design vectors, given as a list or as a matrix (one design vector per row). Design vectors
+        with the same discrete values (i.e. the same architecture topology) are evaluated one after the other, so that
+        the solver is warm-started from the last converged solution of the topology. The set-up OpenMDAO problem is
+        also reused if the architectures only differ in values set after setup (e.g. compressor pressure ratios).
+        Results are returned in the order of the given design vectors."""
+        design_vectors = self._get_design_vector_lists(design_vectors)
+        _, _, is_discrete = self.get_free_design_vector_bounds()
+        i_discrete = [i for i, is_dis in enumerate(is_discrete) if is_dis]
+
+        def _get_discrete_key(i_dv):
+            return tuple(design_vectors[i_dv][i] for i in i_discrete)
+
+        results = [None]*len(design_vectors)
+        for i_dv in sorted(range(len(design_vectors)), key=_get_discrete_key):
+            results[i_dv] = self.evaluate(design_vectors[i_dv])
+        return results
+
     def _save_results(self, **kwargs) -> Optional[int]:
         if self.save_results_folder is None:
             return
@@ -208,17 +300,15 @@ class ArchitectingProblem:
             except RecursionError:
                 contents = 'RECURSION_ERROR'
 
-        os.makedirs(self.save_results_folder, exist_ok=True)
         eval_id = np.random.randint(1e8, 1e9-1)
         ts = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
         path = os.path.join(self.save_results_folder, 'results_%s_%d.txt' % (ts, eval_id))
-        with open(path, 'a') as f:
-            f.write(contents)
+        path_combo = os.path.join(self.save_results_folder, 'results_combined.txt') \
+            if self.save_results_combined else None
 
-        if self.save_results_combined:
-            path_combo = os.path.join(self.save_results_folder, 'results_combined.txt')
-            with open(path_combo, 'a') as f:
-                f.write(contents+'\n\n')
+        self._results_buffer.append((path, path_combo, contents))
+        if len(self._results_buffer) >= self.results_buffer_size:
+            self.flush_results()
 
         # path = os.path.join(self.save_results_folder, 'results_%s_%d.pkl' % (ts, eval_id))
         # with open(path, 'wb') as fp:
@@ -231,16 +321,98 @@ class ArchitectingProblem:
 
         return eval_id
 
+    def flush_results(self):
+        """Writes buffered evaluation results to the results folder."""
+        combined_contents = {}
+        for path, path_combo, contents in self._results_buffer:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'a') as f:
+                f.write(contents)
+
+            if path_combo is not None:
+                combined_contents.setdefault(path_combo, []).append(contents+'\n\n')
+
+        for path_combo, contents in combined_contents.items():
+            with open(path_combo, 'a') as f:
+                f.write(''.join(contents))
+
+        self._results_buffer = []
+
+    def save_results_cache(self, path: str):
+        """Stores the cached evaluation results, so that they can be loaded by a later session of the same problem."""
+        with open(path, 'wb') as fp:
+            pickle.dump({
+                'key': self._get_results_cache_key(),
+                'results': self._results_cache,
+                'eval_ids': self._eval_id_cache,
+                'imputed': self._dv_imputed_cache,
+            }, fp)
+
+    def load_results_cache(self, path: str) -> bool:
+        """Adds evaluation results stored by `save_results_cache()`. Returns False if the file does not exist or has been
+        stored for a different problem definition."""
+        if not os.path.exists(path):
+            return False
+        with open(path, 'rb') as fp:
+            data = pickle.load(fp)
+        if data['key'] != self._get_results_cache_key():
+            return False
+
+        self._results_cache.update(data['results'])
+        self._eval_id_cache.update(data['eval_ids'])
+        self._dv_imputed_cache.update(data['imputed'])
+        return True
+
+    def _get_results_cache_key(self) -> tuple:
+        # Stored results only apply to the same definition of the design variables, choices, metrics (incl. limits),
+        # operating conditions and solver settings
+
+        def _get_key(value):
+            if isinstance(value, OperatingCondition):
+                return (type(value).__name__, type(value.balancer).__name__, value.balancer.tol) + \
+                    tuple((fld.name, _get_key(getattr(value, fld.name))) for fld in fields(value) if fld.name != 'balancer')
+            if is_dataclass(value) and not isinstance(value, type):
+                return (type(value).__name__,)+tuple((fld.name, _get_key(getattr(value, fld.name)))
+                                                     for fld in fields(value))
+            if isinstance(value, (list, tuple)):
+                return tuple(_get_key(val) for val in value)
+            if hasattr(value, '__dict__') and not isinstance(value, (Enum, type)):
+                return (type(value).__name__,)+tuple((key, _get_key(val)) for key, val in sorted(vars(value).items()))
+            return repr(value)
+
+        conditions = [self._an_problem.design_condition]+self._an_problem.evaluate_conditions
+        return (
+            self._results_cache_version,
+            _get_key(self.opt_des_vars),
+            _get_key(self._choices),
+            _get_key([self._objectives, self._constraints, self._metrics]),
+            tuple(tuple(output.name for output in outputs)
+                  for outputs in [self.opt_objectives, self.opt_constraints, self.opt_metrics]),
+            _get_key(conditions),
+            self._max_iter,
+        )
+
     def get_last_eval_id(self):
         return self._last_eval_id
 
-    def generate_architecture(self, design_vector: DesignVector) -> Tuple[TurbofanArchitecture, DesignVector]:
+    def generate_architecture(self, design_vector: Union[DesignVector, np.ndarray]) \
+            -> Tuple[TurbofanArchitecture, DesignVector]:
+        design_vector = self._get_design_vector_list(design_vector)
+
+        # Reuse the last generated architecture if it is requested again (e.g. generate_architecture and then evaluate);
+        # it is only cloned when reused, so the architecture returned the first time should not be modified
+        dv_key = tuple(design_vector)
+        if self._last_generated is not None and self._last_generated[0] == dv_key:
+            _, architecture, imputed_free_design_vector, is_active = self._last_generated
+            self._last_is_active = is_active
+            return architecture.clone(), list(imputed_free_design_vector)
+
         imputed_full_design_vector, decoded_design_vector = self.get_full_design_vector(design_vector)
 
         architecture = self._get_default_architecture()
         i_dv = 0
         is_active = np.ones((len(imputed_full_design_vector),), dtype=bool)
-        for i, choice in enumerate(self.choices):
+        for i, choice in enumerate(self._choices):
             n_dv = len(self._opt_des_vars[i])
             is_active_or_overwrite = choice.modify_architecture(architecture, self.analysis_problem, decoded_design_vector[i_dv:i_dv+n_dv])
 
@@ -257,16 +429,62 @@ class ArchitectingProblem:
 
         imputed_free_design_vector = self.get_free_design_vector(imputed_full_design_vector)
         self._last_is_active = np.array(self.get_free_design_vector(is_active))
+
+        self._last_generated = dv_key, architecture, list(imputed_free_design_vector), self._last_is_active
         return architecture, imputed_free_design_vector
 
     def get_last_is_active(self) -> np.ndarray:
         return self._last_is_active
 
+    def _get_design_vector_list(self, design_vector: Union[DesignVector, np.ndarray]) -> DesignVector:
+        """Design vectors can also be given as arrays: convert in one go, and represent discrete values as integers."""
+        if not isinstance(design_vector, np.ndarray):
+            return design_vector
+
+        _, _, is_discrete = self.get_free_design_vector_bounds()
+        return [int(round(value)) if is_discrete[i] else value for i, value in enumerate(design_vector.tolist())]
+
+    def _get_design_vector_lists(self, design_vectors: Union[List[DesignVector], np.ndarray]) -> List[DesignVector]:
+        """Converts a matrix of design vectors at once, instead of row by row."""
+        if not isinstance(design_vectors, np.ndarray):
+            return [self._get_design_vector_list(design_vector) for design_vector in design_vectors]
+
+        _, _, is_discrete = self.get_free_design_vector_bounds()
+        x = np.array(design_vectors, dtype=np.float64)
+        x[:, is_discrete] = np.round(x[:, is_discrete])
+        is_discrete = is_discrete.tolist()
+        return [[int(value) if is_discrete[i] else value for i, value in enumerate(row)] for row in x.tolist()]
+
+    def get_free_design_vector_bounds(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Lower bounds, upper bounds and discrete mask of the free design variables; discrete variables are encoded as
+        value indices."""
+        if self._free_des_var_bounds is None:
+            free_des_vars = self.free_opt_des_vars
+            lower, upper = np.empty((len(free_des_vars),)), np.empty((len(free_des_vars),))
+            is_discrete = np.zeros((len(free_des_vars),), dtype=bool)
+            for i, des_var in enumerate(free_des_vars):
+                if isinstance(des_var, DiscreteDesignVariable):
+                    lower[i], upper[i] = 0, len(des_var.values)-1
+                    is_discrete[i] = True
+                else:
+                    lower[i], upper[i] = des_var.bounds
+            self._free_des_var_bounds = lower, upper, is_discrete
+        return self._free_des_var_bounds
+
+    def correct_design_vector_matrix(self, x: np.ndarray) -> np.ndarray:
+        """Corrects a matrix of free design vectors (one per row) at once: discrete variables are rounded and all
+        variables are clipped to their bounds."""
+        lower, upper, is_discrete = self.get_free_design_vector_bounds()
+        x = np.array(x, dtype=np.float64)
+        x[:, is_discrete] = np.round(x[:, is_discrete])
+        return np.clip(x, lower, upper)
+
     def get_full_design_vector(self, free_design_vector: DesignVector) -> Tuple[DesignVector, DecodedDesignVector]:
         full_design_vector, decoded_design_vector = [], []
         i_free = 0
+        is_free = self._get_is_free_des_var()
         for i, des_var in enumerate(self.opt_des_vars):
-            if des_var.is_fixed:
+            if not is_free[i]:
                 fixed_value = des_var.get_fixed_value()
                 decoded_design_vector.append(fixed_value)
                 full_design_vector.append(des_var.encode(fixed_value))
@@ -284,8 +502,8 @@ class ArchitectingProblem:
         return full_design_vector, decoded_design_vector
 
     def get_free_design_vector(self, design_vector: DesignVector) -> DesignVector:
-        opt_des_vars = self.opt_des_vars
-        return [value for i, value in enumerate(design_vector) if not opt_des_vars[i].is_fixed]
+        is_free = self._get_is_free_des_var()
+        return [value for i, value in enumerate(design_vector) if is_free[i]]
 
     @staticmethod
     def _get_default_architecture() -> TurbofanArchitecture:
@@ -293,37 +511,80 @@ class ArchitectingProblem:
 
     def evaluate_architecture(self, architecture: TurbofanArchitecture) -> OperatingMetricsMap:
 
-        # Build the pyCycle/OpenMDAO analysis chain
-        builder = CycleBuilder(architecture, self.analysis_problem, max_iter=self._max_iter)
-        openmdao_problem = builder.get_problem()
+        # Warm-start the design balancer from the last converged solution of the same architecture topology
+        design_condition = self.analysis_problem.design_condition
+        balancer = design_condition.balancer
+        warm_start_key = self._get_topology_key(architecture) if isinstance(balancer, DesignBalancer) else None
+        if warm_start_key is not None:
+            default_init_values = balancer.get_init_values()
+            balancer.set_init_values(**self._warm_start_cache.get(warm_start_key, {}))
 
-        # Run the problem
-        builder.run(openmdao_problem, print_solver=self.verbose)
-        if self.print_results:
-            builder.print_results(openmdao_problem)
-        builder.view_n2(openmdao_problem, show_browser=False)
-        return builder.get_metrics(openmdao_problem)
+        try:
+            # Build the pyCycle/OpenMDAO analysis chain
+            builder = CycleBuilder(architecture, self.analysis_problem, max_iter=self._max_iter,
+                                   problem_cache=self._problem_cache)
+            openmdao_problem = builder.get_problem()
+
+            # Initial guesses are only applied when setting up the problem: also set them in case it has been reused
+            if warm_start_key in self._warm_start_cache:
+                balancer.set_problem_init_values(openmdao_problem, design_condition.name, architecture)
+
+            # Run the problem
+            builder.run(openmdao_problem, print_solver=self.verbose)
+            if warm_start_key is not None:
+                self._warm_start_cache[warm_start_key] = \
+                    balancer.get_converged_values(openmdao_problem, design_condition.name, architecture)
+
+            if self.print_results:
+                builder.print_results(openmdao_problem)
+            if self.view_n2:
+                builder.view_n2(openmdao_problem, show_browser=False)
+            metrics = builder.get_metrics(openmdao_problem)
+
+            builder.release_problem(openmdao_problem)
+            return metrics
+
+        finally:
+            if warm_start_key is not None:
+                balancer.set_init_values(**default_init_values)
+
+    @staticmethod
+    def _get_topology_key(architecture: TurbofanArchitecture) -> tuple:
+        return tuple((type(element).__name__, element.name) for element in architecture.elements)
 
     def extract_metrics(self, architecture: TurbofanArchitecture, imputed_design_vector: DesignVector,
                         results: OperatingMetricsMap) -> Tuple[List[float], List[float], List[float]]:
 
+        # Metrics used in multiple roles are only extracted once
+        extracted_values = {}
+
+        def _extract(metric: ArchitectingMetric, extract_func) -> List[float]:
+            key = metric.get_extract_key()
+            if key is not None and key in extracted_values:
+                return extracted_values[key]
+
+            values = list(extract_func(self.analysis_problem, results, architecture))
+            if key is not None:
+                extracted_values[key] = values
+            return values
+
         objective_values = []
-        for metric in self.objectives:
+        for metric in self._objectives:
             try:
-                objective_values += list(metric.extract_obj(self.analysis_problem, results, architecture))
+                objective_values += _extract(metric, metric.extract_obj)
             except:
                 objective_values.append(np.nan)
 
         constraint_values = []
-        for metric in self.constraints:
+        for metric in self._constraints:
             try:
-                constraint_values += list(metric.extract_con(self.analysis_problem, results, architecture))
+                constraint_values += _extract(metric, metric.extract_con)
             except:
                 constraint_values.append(np.nan)
 
         _, full_decoded_design_vector = self.get_full_design_vector(imputed_design_vector)
         i_dv = 0
-        for i, choice in enumerate(self.choices):
+        for i, choice in enumerate(self._choices):
             n_dv = len(self._opt_des_vars[i])
             choice_dv = full_decoded_design_vector[i_dv:i_dv+n_dv]
             choice_con_values = choice.evaluate_constraints(architecture, choice_dv, self.analysis_problem, results)
@@ -332,15 +593,37 @@ class ArchitectingProblem:
             i_dv += n_dv
 
         metric_values = []
-        for metric in self.metrics:
+        for metric in self._metrics:
             try:
-                metric_values += list(metric.extract_met(self.analysis_problem, results, architecture))
+                metric_values += _extract(metric, metric.extract_met)
             except:
                 metric_values.append(np.nan)
 
         return objective_values, constraint_values, metric_values
 
+    def __getstate__(self):
+        # Evaluation caches only apply to the current process, so they are not sent along to worker processes
+        state = self.__dict__.copy()
+        state['_results_cache'] = {}
+        state['_eval_id_cache'] = {}
+        state['_dv_imputed_cache'] = {}
+        state['_last_generated'] = None
+        state['_warm_start_cache'] = {}
+        state['_problem_cache'] = ProblemCache(size=self._problem_cache.size)
+
+        # Buffered results are written by this process; copies (e.g. in worker processes) are not guaranteed to live
+        # until finalize is called, so they write their results immediately
+        state['_results_buffer'] = []
+        state['results_buffer_size'] = 0
+        return state
+
     def finalize(self):
-        """Prepares the problem so that it can be safely pickled to store the results"""
+        """Prepares the problem so that it can be safely pickled to store the results; also releases the cached
+        OpenMDAO problems"""
+        self.flush_results()
+        self._problem_cache.clear()
         self._results_cache = {}
         self._eval_id_cache = {}
+        self._dv_imputed_cache = {}
+        self._last_generated = None
+        self._warm_start_cache = {}
@@ -23,7 +23,7 @@ from pymoo.model.population import Population
 from open_turb_arch.architecting.problem import *
 from open_turb_arch.architecting.opt_defs import *
 
-__all__ = ['PymooArchitectingProblem', 'ArchitectingProblemRepair']
+__all__ = ['PymooArchitectingProblem', 'ArchitectingProblemRepair', 'get_unordered_starmap']
 
 
 class PymooArchitectingProblem(Problem):
@@ -107,14 +107,32 @@ class PymooArchitectingProblem(Problem):
 
         return xl, xu, mask, is_int_mask, is_cat_mask
 
+    def _evaluate_elementwise(self, X, calc_gradient, out, *args, **kwargs):
+        """Design vectors with the same discrete values (i.e. the same architecture topology) are evaluated one after
+        the other (also within the chunks sent to worker processes), for warm-starting and problem reuse as in
+        `ArchitectingProblem.evaluate_many`. Outputs are returned in the order of the population."""
+
+        # Sort on the rounded discrete values (sampled populations are not repaired); the primary sort key is the first
+        # discrete design variable
+        x_discrete = self.problem.correct_design_vector_matrix(X)[:, self.is_discrete_mask]
+        i_sorted = np.lexsort(x_discrete.T[::-1])
+        ret = super(PymooArchitectingProblem, self)._evaluate_elementwise(
+            X[i_sorted, :], calc_gradient, out, *args, **kwargs)
+        if ret is not None:
+            out = ret
+
+        i_restore = np.argsort(i_sorted)
+        for key, value in out.items():
+            if isinstance(value, np.ndarray) and value.shape[0] == len(i_sorted):
+                out[key] = value[i_restore]
+        return out
+
     def _evaluate(self, x, out, *args, **kwargs):
         # Correct integer design variables
-        is_discrete_mask = self.is_discrete_mask
-        x = ArchitectingProblemRepair.correct_x(np.array([x]), is_discrete_mask)[0, :]
+        x = self.problem.correct_design_vector_matrix(np.array([x]))[0, :]
 
         # Evaluate the architecture
-        x_arch = [int(val) if is_discrete_mask[j] else float(val) for j, val in enumerate(x)]
-        imputed_design_vector, objectives, constraints, _ = self.problem.evaluate(x_arch)
+        imputed_design_vector, objectives, constraints, _ = self.problem.evaluate(x)
         out['ID'] = self.problem.get_last_eval_id() or -1
         out['is_active'] = self.problem.get_last_is_active()
 
@@ -134,13 +152,11 @@ class PymooArchitectingProblem(Problem):
         """Method to querying whether design variables are active.
         Returns boolean matrix with same shape as the design vectors, and the imputed design vectors."""
 
-        is_discrete_mask = self.is_discrete_mask
         is_active = np.ones(x.shape, dtype=bool)
-        x = ArchitectingProblemRepair.correct_x(x, is_discrete_mask)
+        x = self.problem.correct_design_vector_matrix(x)
         x_imp = x.copy()
         for i in range(x.shape[0]):
-            x_arch = [int(val) if is_discrete_mask[j] else float(val) for j, val in enumerate(x[i, :])]
-            _, x_imp_i = self.problem.generate_architecture(x_arch)
+            _, x_imp_i = self.problem.generate_architecture(x[i, :])
             x_imp[i, :] = x_imp_i
             is_active[i, :] = self.problem.get_last_is_active()
 
@@ -175,3 +191,36 @@ class ArchitectingProblemRepair(Repair):
         x = np.copy(x)
         x[:, is_discrete_mask] = np.round(x[:, is_discrete_mask].astype(np.float64)).astype(np.int)
         return x
+
+
+def get_unordered_starmap(pool, chunksize=8) -> Callable[[Callable, Iterable], list]:
+    """
+    Get a starmap function to be used for pymoo's starmap parallelization. In contrast to pool.starmap, results are
+    collected as soon as they are finished (using imap_unordered), so that one slow evaluation does not keep the other
+    workers waiting. Results are returned in the order of the inputs.
+
+    Example usage:
+    ```
+    with multiprocessing.Pool(3) as pool:
+        problem.parallelization = ('starmap', get_unordered_starmap(pool))
+    ```
+    """
+
+    def _starmap(func: Callable, iterable: Iterable) -> list:
+        results = {}
+        for i, result in pool.imap_unordered(_IndexedCall(func), enumerate(iterable), chunksize=chunksize):
+            results[i] = result
+        return [results[i] for i in range(len(results))]
+
+    return _starmap
+
+
+class _IndexedCall:
+    """Picklable wrapper calling a function with unpacked arguments and returning the result together with the index."""
+
+    def __init__(self, func: Callable):
+        self.func = func
+
+    def __call__(self, i_args):
+        i, args = i_args
+        return i, self.func(*args)
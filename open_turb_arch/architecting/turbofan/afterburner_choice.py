@@ -85,4 +85,4 @@ class AfterburnerChoice(ArchitectingChoice):
         afterburner.target = nozzle
 
         # Add afterburner to the architecture elements
-        architecture.elements.insert(architecture.elements.index(turbine)+1, afterburner)
+        architecture.insert_element(architecture.elements.index(turbine)+1, afterburner)
@@ -240,7 +240,7 @@ class CoolingBleedChoice(ArchitectingChoice):
                 compressors[-1-1*number].target = bleed_inter
 
                 # Add BleedInter to architecture elements
-                architecture.elements.insert(architecture.elements.index(compressors[-1-1*number])+1, bleed_inter)
+                architecture.insert_element(architecture.elements.index(compressors[-1-1*number])+1, bleed_inter)
 
     @staticmethod
     def _include_bleed_intra(architecture: TurbofanArchitecture, fractions: list):
@@ -290,4 +290,4 @@ class CoolingBleedChoice(ArchitectingChoice):
                 )
 
                 # Add BleedIntra to architecture elements
-                architecture.elements.insert(architecture.elements.index(compressors[-1-1*number])+1, bleed_intra)
+                architecture.insert_element(architecture.elements.index(compressors[-1-1*number])+1, bleed_intra)
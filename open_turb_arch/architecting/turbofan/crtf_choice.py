@@ -84,7 +84,7 @@ class CRTFChoice(ArchitectingChoice):
         crtf.target = fan
 
         # Insert CRTF into architecture elements list
-        architecture.elements.insert(architecture.elements.index(fan), crtf)
+        architecture.insert_element(architecture.elements.index(fan), crtf)
 
         # Connect fan to shaft
         shaft = architecture.get_elements_by_type(Shaft)[0]
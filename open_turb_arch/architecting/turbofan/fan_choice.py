@@ -93,9 +93,9 @@ class FanChoice(ArchitectingChoice):
         )
 
         # Insert fan, splitter and bypass flow into architecture elements list
-        architecture.elements.insert(1, fan)
-        architecture.elements.insert(2, splitter)
-        architecture.elements.insert(architecture.elements.index(nozzle_core)+1, bypass_nozzle)
+        architecture.insert_element(1, fan)
+        architecture.insert_element(2, splitter)
+        architecture.insert_element(architecture.elements.index(nozzle_core)+1, bypass_nozzle)
 
         # Find inlet
         inlet = architecture.get_elements_by_type(Inlet)[0]
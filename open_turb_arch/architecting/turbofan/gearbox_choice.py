@@ -95,8 +95,8 @@ class GearboxChoice(ArchitectingChoice):
         core_shaft.connections.append(gearbox)
         fan_shaft.connections.append(gearbox)
 
-        architecture.elements.insert(architecture.elements.index(core_shaft), fan_shaft)
-        architecture.elements.insert(architecture.elements.index(fan_shaft), gearbox)
+        architecture.insert_element(architecture.elements.index(core_shaft), fan_shaft)
+        architecture.insert_element(architecture.elements.index(fan_shaft), gearbox)
 
         if crtf is not None:
             # Disconnect crtf from LP_shaft
@@ -138,4 +138,4 @@ class IntercoolerChoice(ArchitectingChoice):
             intercooler.flow_out_coolant = 'Fl_I2'
 
         # Add intercooler to the architecture elements
-        architecture.elements.insert(architecture.elements.index(compressor)+1, intercooler)
+        architecture.insert_element(architecture.elements.index(compressor)+1, intercooler)
@@ -86,4 +86,4 @@ class ITBChoice(ArchitectingChoice):
         itb.target = turbine_ip
 
         # Add itb to the architecture elements
-        architecture.elements.insert(architecture.elements.index(turbine)+1, itb)
+        architecture.insert_element(architecture.elements.index(turbine)+1, itb)
@@ -72,8 +72,8 @@ class NozzleMixingChoice(ArchitectingChoice):
         source_bypass = architecture.get_elements_by_type(Splitter)[0]
 
         # Remove core and bypass nozzle
-        architecture.elements.remove(nozzle_core)
-        architecture.elements.remove(nozzle_bypass)
+        architecture.remove_element(nozzle_core)
+        architecture.remove_element(nozzle_bypass)
 
         # Create new elements: joint nozzle and mixer
         nozzle_joint = Nozzle(
@@ -92,5 +92,5 @@ class NozzleMixingChoice(ArchitectingChoice):
         source_bypass.flow_out = 'Fl_I2'
 
         # Add joint nozzle and mixer to the architecture elements
-        architecture.elements.insert(architecture.elements.index(source_core)+1, mixer)
-        architecture.elements.insert(architecture.elements.index(mixer)+1, nozzle_joint)
+        architecture.insert_element(architecture.elements.index(source_core)+1, mixer)
+        architecture.insert_element(architecture.elements.index(mixer)+1, nozzle_joint)
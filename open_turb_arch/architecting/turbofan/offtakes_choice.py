@@ -105,4 +105,4 @@ class OfftakesChoice(ArchitectingChoice):
         compressor.bleed_names.append('bleed_offtake_atmos')
 
         # Add BleedIntra to architecture elements
-        architecture.elements.insert(architecture.elements.index(compressor), bleed_offtake)
+        architecture.insert_element(architecture.elements.index(compressor), bleed_offtake)
@@ -207,9 +207,9 @@ class ShaftChoice(ArchitectingChoice):
             )
 
             # Insert compressor, turbine and shaft into architecture elements list
-            architecture.elements.insert(architecture.elements.index(compressor), comp_new)
-            architecture.elements.insert(architecture.elements.index(turbine)+1, turb_new)
-            architecture.elements.insert(architecture.elements.index(shaft), shaft_new)
+            architecture.insert_element(architecture.elements.index(compressor), comp_new)
+            architecture.insert_element(architecture.elements.index(turbine)+1, turb_new)
+            architecture.insert_element(architecture.elements.index(shaft), shaft_new)
 
             # Reroute flow from inlet and new compressor
             comp_new.target = compressor
@@ -9,22 +9,22 @@ def get_turbojet_architecture() -> TurbofanArchitecture:
         mach=.6, p_recovery=1,
     )
 
-    inlet.target = compressor = Compressor(
+    compressor = Compressor(
         name='compressor', map=CompressorMap.AXI_5,
         mach=.4, pr=13.5, eff=.83,
     )
 
-    compressor.target = burner = Burner(
+    burner = Burner(
         name='burner', fuel=FuelType.JET_A,
         mach=.1, p_loss_frac=.03,
     )
 
-    burner.target = turbine = Turbine(
+    turbine = Turbine(
         name='turbine', map=TurbineMap.LPT_2269,
         mach=.4, eff=.86,
     )
 
-    turbine.target = nozzle = Nozzle(
+    nozzle = Nozzle(
         name='nozzle_core', type=NozzleType.CD,
         v_loss_coefficient=.99,
     )
@@ -34,4 +34,4 @@ def get_turbojet_architecture() -> TurbofanArchitecture:
         rpm_design=8070, power_loss=0.,
     )
 
-    return TurbofanArchitecture(elements=[inlet, compressor, burner, turbine, nozzle, shaft])
+    return TurbofanArchitecture.from_chain([inlet, compressor, burner, turbine, nozzle], shafts=[shaft])
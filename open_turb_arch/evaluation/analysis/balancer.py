@@ -15,6 +15,8 @@ Copyright: (c) 2020, Deutsches Zentrum fuer Luft- und Raumfahrt e.V.
 Contact: jasper.bussemaker@dlr.de
 """
 
+import numpy as np
+from typing import *
 import openmdao.api as om
 import warnings
 import pycycle.api as pyc
@@ -44,13 +46,86 @@ class DesignBalancer(Balancer):
             init_extraction_bleed_frac: float = 0.02,
             init_gearbox_torque: float = 32500,
             init_mixer_er: float = 5.,
+            tol: float = 1e-8,
     ):
         self._init_mass_flow = init_mass_flow
         self._init_far = init_far
         self._init_turbine_pr = init_turbine_pr
+        self._init_turbine_prs: Dict[str, float] = {}  # Per turbine name, overrides init_turbine_pr
         self._init_extraction_bleed_frac = init_extraction_bleed_frac
         self._init_gearbox_torque = init_gearbox_torque
         self._init_mixer_er = init_mixer_er
+        self.tol = tol
+
+    def get_init_values(self) -> Dict[str, Union[float, Dict[str, float]]]:
+        """Initial guesses of the balance parameters, keyed by the name of the init_* constructor argument; turbine_prs
+        contains initial turbine pressure ratios per turbine name."""
+        return {
+            'mass_flow': self._init_mass_flow,
+            'far': self._init_far,
+            'turbine_pr': self._init_turbine_pr,
+            'turbine_prs': dict(self._init_turbine_prs),
+            'extraction_bleed_frac': self._init_extraction_bleed_frac,
+            'gearbox_torque': self._init_gearbox_torque,
+            'mixer_er': self._init_mixer_er,
+        }
+
+    def set_init_values(self, **init_values: Union[float, Dict[str, float]]):
+        """Overwrite initial guesses (same keys as get_init_values), for example to warm-start from a previous
+        solution."""
+        for key, value in init_values.items():
+            if not hasattr(self, '_init_'+key):
+                raise ValueError('Unknown balancer initial value: %s' % key)
+            setattr(self, '_init_'+key, value)
+
+    def get_converged_values(self, problem: om.Problem, condition_name: str, architecture: TurbofanArchitecture) \
+            -> Dict[str, Union[float, Dict[str, float]]]:
+        """Get the balance parameters of a solved problem, in the format of get_init_values."""
+
+        def _get_val(param_name, val_units=None):
+            val = problem.get_val('%s.%s.%s' % (condition_name, self.balance_name, param_name), units=val_units,
+                                  get_remote=None)
+            return float(np.atleast_1d(val)[0])
+
+        values = {key: _get_val(param_name, val_units)
+                  for key, param_name, val_units in self._get_balance_params(architecture)}
+
+        # Pressure ratios differ a lot between turbines (e.g. HPT and LPT), so they are stored per turbine
+        turbines = architecture.get_elements_by_type(Turbine)
+        if len(turbines) > 0:
+            values['turbine_prs'] = {turbine.name: _get_val(turbine.name+'_PR') for turbine in turbines}
+
+        return values
+
+    def set_problem_init_values(self, problem: om.Problem, condition_name: str, architecture: TurbofanArchitecture):
+        """Set the initial guesses as values of the balance parameters of a set-up problem. The initial guesses are
+        otherwise only applied when setting up the problem, so this is needed to warm-start a reused problem."""
+
+        def _set_val(param_name, value, val_units=None):
+            problem.set_val('%s.%s.%s' % (condition_name, self.balance_name, param_name), value, units=val_units)
+
+        init_values = self.get_init_values()
+        for key, param_name, val_units in self._get_balance_params(architecture):
+            _set_val(param_name, init_values[key], val_units)
+
+        for turbine in architecture.get_elements_by_type(Turbine):
+            _set_val(turbine.name+'_PR', self._init_turbine_prs.get(turbine.name, self._init_turbine_pr))
+
+    @staticmethod
+    def _get_balance_params(architecture: TurbofanArchitecture) -> List[Tuple[str, str, Optional[str]]]:
+        """Init value key, balance parameter name and units of the balances (except turbine pressure ratios)."""
+        params = [('mass_flow', 'W', units.MASS_FLOW), ('far', 'FAR', None)]
+
+        if any(compressor.offtake_bleed for compressor in architecture.get_elements_by_type(Compressor)):
+            params.append(('extraction_bleed_frac', 'extraction_bleed', None))
+
+        if len(architecture.get_elements_by_type(Gearbox)):
+            params.append(('gearbox_torque', 'gb_trq', units.TORQUE))
+
+        if len(architecture.get_elements_by_type(Mixer)):
+            params.append(('mixer_er', 'BPR', None))
+
+        return params
 
     def apply(self, cycle: ArchitectureCycle, architecture: TurbofanArchitecture):
         balance = cycle.add_subsystem(self.balance_name, om.BalanceComp())
@@ -117,7 +192,8 @@ class DesignBalancer(Balancer):
 
             # Add a balance for the turbine pressure ratio
             param_name = turbine.name+'_PR'
-            balance.add_balance(param_name, val=self._init_turbine_pr, lower=1.001, upper=15, eq_units='hp', rhs_val=0.)
+            init_pr = self._init_turbine_prs.get(turbine.name, self._init_turbine_pr)
+            balance.add_balance(param_name, val=init_pr, lower=1.001, upper=15, eq_units='hp', rhs_val=0.)
 
             # Use the balance parameter to control the turbine pressure ratio
             cycle.connect('%s.%s' % (balance.name, param_name), turbine.name+'.PR')
@@ -161,12 +237,14 @@ class OffDesignBalancer(Balancer):
             init_far: float = .017,
             init_shaft_rpm: float = 5000.,  # rpm
             init_extraction_bleed_frac: float = 0.02,
+            tol: float = 1e-8,
     ):
         self._init_mass_flow = init_mass_flow
         self._init_bpr = init_bpr
         self._init_far = init_far
         self._init_shaft_rpm = init_shaft_rpm
         self._init_extraction_bleed_frac = init_extraction_bleed_frac
+        self.tol = tol
 
     def apply(self, cycle: ArchitectureCycle, architecture: TurbofanArchitecture):
         balance = cycle.add_subsystem(self.balance_name, om.BalanceComp())
@@ -21,16 +21,17 @@ import numpy as np
 from typing import *
 import openmdao.api as om
 import pycycle.api as pyc
+from collections import OrderedDict
 from ordered_set import OrderedSet
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 import open_turb_arch.evaluation.architecture.units as units
 from open_turb_arch.evaluation.architecture.turbomachinery import *
 from open_turb_arch.evaluation.architecture.flow import *
 from open_turb_arch.evaluation.architecture.architecture import *
 from open_turb_arch.evaluation.analysis.disciplines import *
 
-__all__ = ['CycleBuilder', 'ArchitectureCycle', 'ArchitectureMultiPointCycle', 'OperatingCondition', 'DesignCondition',
-           'EvaluateCondition', 'OperatingMetrics', 'AnalysisProblem']
+__all__ = ['CycleBuilder', 'ProblemCache', 'ArchitectureCycle', 'ArchitectureMultiPointCycle', 'OperatingCondition',
+           'DesignCondition', 'EvaluateCondition', 'OperatingMetrics', 'AnalysisProblem']
 
 
 @dataclass(frozen=False)
@@ -244,8 +245,8 @@ class ArchitectureCycle(pyc.Cycle):
 
     def _set_solvers(self):
         newton = self.nonlinear_solver = om.NewtonSolver()
-        newton.options['atol'] = 1e-8
-        newton.options['rtol'] = 1e-8
+        newton.options['atol'] = self.condition.balancer.tol
+        newton.options['rtol'] = self.condition.balancer.tol
         newton.options['iprint'] = 2
         newton.options['maxiter'] = self._max_iter
         newton.options['solve_subsystems'] = True
@@ -334,12 +335,13 @@ class ArchitectureCycle(pyc.Cycle):
         print(" %7.5f  %7.1f %7.3f %7.1f %7.1f %7.1f %7.3f  %7.5f" % data, file=fp, flush=True)
 
     def _print_disciplines(self, problem: om.Problem, fp=sys.stdout):
+        ops_metrics = self.get_metrics(problem)
         data = (
-            Weight(self.get_metrics(problem), self.architecture).weight_calculation()[0],
-            Length(self.get_metrics(problem), self.architecture).length_calculation()[0],
-            Diameter(self.get_metrics(problem), self.architecture).diameter_calculation()[1],
-            NOx(self.get_metrics(problem)).NOx_calculation(),
-            Noise(self.get_metrics(problem), self.architecture).noise_calculation()
+            Weight(ops_metrics, self.architecture).weight_calculation()[0],
+            Length(ops_metrics, self.architecture).length_calculation()[0],
+            Diameter(ops_metrics, self.architecture).diameter_calculation()[1],
+            NOx(ops_metrics).NOx_calculation(),
+            Noise(ops_metrics, self.architecture).noise_calculation()
         )
 
         print("----------------------------------------------------------------------------", file=fp, flush=True)
@@ -393,7 +395,9 @@ class ArchitectureCycle(pyc.Cycle):
 
 
 class ArchitectureMultiPointCycle(pyc.MPCycle):
-    """A cycle evaluating the architecture at multiple operating conditions."""
+    """A cycle evaluating the architecture at multiple operating conditions. All conditions are part of the same model,
+    so it is set up once and solved in one run; the off-design points depend on the sizing results of the design
+    point, so they cannot be solved independently of it."""
 
     def __init__(self, architecture: TurbofanArchitecture, design_condition: DesignCondition,
                  evaluate_conditions: List[EvaluateCondition] = None, max_iter=20):
@@ -449,27 +453,84 @@ class ArchitectureMultiPointCycle(pyc.MPCycle):
     def get_metrics(self, problem: om.Problem) -> Dict[OperatingCondition, OperatingMetrics]:
         return {cycle.condition: cycle.get_metrics(problem) for cycle in self._cycles}
 
+    def set_architecture(self, architecture: TurbofanArchitecture, design_condition: DesignCondition,
+                         evaluate_conditions: List[EvaluateCondition] = None):
+        """Point an already set-up cycle to another architecture and conditions with the same setup (topology and
+        setup parameters), for example when reusing a cached problem."""
+        self.architecture = architecture
+        self.design_condition = design_condition
+        self.evaluate_conditions = evaluate_conditions or []
+        for cycle, condition in zip(self._cycles, self.conditions):
+            cycle.architecture = architecture
+            cycle.condition = condition
+
+
+class ProblemCache:
+    """Set-up OpenMDAO problems that can be reused by the CycleBuilders of one owner (e.g. an ArchitectingProblem).
+    Problems are taken out of the cache while they are used, and released back by the builder."""
+
+    def __init__(self, size=4):
+        self.size = size  # Max number of set-up problems kept in memory (0 disables caching)
+        self._problems: 'OrderedDict[tuple, om.Problem]' = OrderedDict()
+
+    def __len__(self):
+        return len(self._problems)
+
+    def pop(self, key: tuple) -> Optional[om.Problem]:
+        return self._problems.pop(key, None)
+
+    def add(self, key: tuple, problem: om.Problem):
+        if self.size <= 0:
+            return
+
+        self._problems[key] = problem
+        while len(self._problems) > self.size:
+            self._problems.popitem(last=False)
+
+    def clear(self):
+        self._problems.clear()
+
 
 class CycleBuilder:
     """Builds a pyCycle OpenMDAO Problem that analyzes/sizes the turbofan architecture for the given analysis
-    problem."""
+    problem. If a problem cache is given, successfully run problems can be released to it, so that building an
+    architecture with the same topology and setup parameters for the same conditions again skips the OpenMDAO setup:
+    the remaining values (e.g. compressor pressure ratios and the operating condition values) are set on each
+    get_problem."""
 
-    def __init__(self, architecture: TurbofanArchitecture, problem: AnalysisProblem, max_iter=20):
+    def __init__(self, architecture: TurbofanArchitecture, problem: AnalysisProblem, max_iter=20,
+                 problem_cache: ProblemCache = None):
         self.architecture = architecture
         self.problem = problem
         self._max_iter = max_iter
+        self.problem_cache = problem_cache
         self._mp_cycle: Optional[ArchitectureMultiPointCycle] = None
+        self._cache_key = None
+        self._run_problem: Optional[om.Problem] = None  # Last successfully run problem
+        self._metrics: Optional[Tuple[om.Problem, int, Dict[OperatingCondition, OperatingMetrics]]] = None
 
     @property
     def conditions(self) -> List[OperatingCondition]:
         return [self.problem.design_condition]+list(self.problem.evaluate_conditions)
 
     def get_problem(self) -> om.Problem:
-
-        # Construct problem
-        problem = om.Problem()
-        problem.model = self._mp_cycle = self._get_multi_point_cycle()
-        problem.setup(check=False)
+        self._metrics = None
+        self._run_problem = None
+        use_cache = self.problem_cache is not None and self.problem_cache.size > 0
+        self._cache_key = self._get_cache_key() if use_cache else None
+
+        # Take the problem out of the cache, so that it cannot be used by two builders at the same time; it is only
+        # added back by release_problem
+        problem = self.problem_cache.pop(self._cache_key) if self._cache_key is not None else None
+        if problem is not None:
+            self._mp_cycle = problem.model
+            self._mp_cycle.set_architecture(
+                self.architecture, self.problem.design_condition, evaluate_conditions=self.problem.evaluate_conditions)
+        else:
+            # Construct problem
+            problem = om.Problem()
+            problem.model = self._mp_cycle = self._get_multi_point_cycle()
+            problem.setup(check=False)
 
         # Define the design point
         for condition in self.conditions:
@@ -487,12 +548,55 @@ class CycleBuilder:
             self.architecture, self.problem.design_condition, evaluate_conditions=self.problem.evaluate_conditions,
             max_iter=self._max_iter)
 
+    def _get_cache_key(self) -> Optional[tuple]:
+        """The problem setup depends on the topology of the architecture and the element parameters used during setup
+        (i.e. all except the problem value fields), and on the operating conditions (compared by value). Of the balancer
+        only the type and solver tolerance are included, as its initial values only determine the starting point of the
+        solver."""
+
+        def _get_value_key(value):
+            if isinstance(value, ArchElement):
+                return value.name
+            if isinstance(value, (list, tuple)):
+                return tuple(_get_value_key(val) for val in value)
+            return value
+
+        def _get_fields_key(obj, skip=()):
+            return (type(obj),)+tuple((fld.name, _get_value_key(getattr(obj, fld.name)))
+                                      for fld in fields(obj) if fld.name not in skip)
+
+        key = (
+            tuple(_get_fields_key(element, skip=element.problem_value_fields)
+                  for element in self.architecture.elements),
+            tuple((type(condition.balancer), condition.balancer.tol) +
+                  _get_fields_key(condition, skip=('balancer',)) for condition in self.conditions),
+            self._max_iter,
+        )
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def release_problem(self, problem: om.Problem):
+        """Adds the problem to the problem cache if it has been run successfully. Call after the results have been
+        printed and extracted, as these may modify the problem."""
+        if self._cache_key is None or self._run_problem is not problem:
+            return
+
+        self.problem_cache.add(self._cache_key, problem)
+        self._run_problem = None
+
     @staticmethod
     def view_n2(problem: om.Problem, **kwargs):
         om.n2(problem, **kwargs)
 
-    @staticmethod
-    def run(problem: om.Problem, print_solver=True):
+    def run(self, problem: om.Problem, print_solver=True):
+        self._metrics = None
+        self._run_problem = None
+
+        # Count the runs of the problem: cached problems can be run by other builders too
+        problem.n_cycle_runs = getattr(problem, 'n_cycle_runs', 0)+1
         problem.set_solver_print(level=-1)
         if print_solver:
             problem.set_solver_print(level=2, depth=1)
@@ -505,11 +609,20 @@ class CycleBuilder:
             # pyCycle may set numpy error raising behavior: reset to ignore here
             np.seterr(all='ignore')
 
+        self._run_problem = problem
+
     def print_results(self, problem: om.Problem, fp=sys.stdout):
         self._mp_cycle.print_results(problem, fp=fp)
 
     def get_metrics(self, problem: om.Problem) -> Dict[OperatingCondition, OperatingMetrics]:
-        return self._mp_cycle.get_metrics(problem)
+        # Metrics are read from the problem once after each run
+        n_runs = getattr(problem, 'n_cycle_runs', 0)
+        if self._metrics is None or self._metrics[0] is not problem or self._metrics[1] != n_runs:
+            self._metrics = problem, n_runs, self._mp_cycle.get_metrics(problem)
+
+        # A cached problem may have been set up for other (equal) condition objects
+        metrics_by_name = {condition.name: metrics for condition, metrics in self._metrics[2].items()}
+        return {condition: metrics_by_name[condition.name] for condition in self.conditions}
 
 
 class Balancer:
@@ -517,6 +630,7 @@ class Balancer:
     consistent (i.e. they solve the residuals)."""
 
     balance_name = 'engine_balance'
+    tol = 1e-8  # Absolute and relative tolerance of the Newton solver that solves the balances
 
     def apply(self, cycle: ArchitectureCycle, architecture: TurbofanArchitecture):
         """Add balances and set initial guesses."""
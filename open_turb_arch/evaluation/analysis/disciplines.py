@@ -23,6 +23,11 @@ from open_turb_arch.evaluation.architecture import *
 
 __all__ = ['Weight', 'Length', 'Diameter', 'NOx', 'Noise']
 
+# Sea-level conditions according to the ISA atmosphere
+T_ISA = 288.15  # K
+RHO_ISA = 1.225  # kg/m3
+C_ISA = sqrt(1.4*287.05*T_ISA)  # m/s
+
 
 @dataclass(frozen=False)
 class Weight:
@@ -38,11 +43,11 @@ class Weight:
 
         # Check whether gearbox and heat exchanger are present
         gear = False if not self.architecture.get_elements_by_type(Gearbox) else True
-        hex = False if not self.architecture.get_elements_by_type(HeatExchanger) else True
-        hex_length = self.architecture.get_elements_by_type(HeatExchanger)[0].length if hex else 0
-        hex_radius = self.architecture.get_elements_by_type(HeatExchanger)[0].radius if hex else 0
-        hex_number = self.architecture.get_elements_by_type(HeatExchanger)[0].number if hex else 0
-        hex_area = 2*np.pi*hex_radius*hex_length*hex_number
+        heat_exchangers = self.architecture.get_elements_by_type(HeatExchanger)
+        hex_area = 0
+        if heat_exchangers:
+            hex = heat_exchangers[0]
+            hex_area = 2*np.pi*hex.radius*hex.length*hex.number
 
         # Check if fan and CRTF are present
         fan_present = False
@@ -78,22 +83,21 @@ class Weight:
         weight_engine = (a*(massflow_core*2.2046226218/100)**b*(opr/40)**c)/2.2046226218
 
         # Add engine weight changes based on MIT component weights, unless mentioned otherwise
-        if len(self.architecture.get_elements_by_type(Turbine)) != 2:  # No 2-shaft engine
-            weight_engine *= 1.1**(len(self.architecture.get_elements_by_type(Turbine))-2)
-        if len(self.architecture.get_elements_by_type(Burner)) != 1:  # ITB
-            weight_engine *= 1.05**(len(self.architecture.get_elements_by_type(Burner))-1)
+        n_turbines = len(self.architecture.get_elements_by_type(Turbine))
+        n_burners = len(self.architecture.get_elements_by_type(Burner))
+        if n_turbines != 2:  # No 2-shaft engine
+            weight_engine *= 1.1**(n_turbines-2)
+        if n_burners != 1:  # ITB
+            weight_engine *= 1.05**(n_burners-1)
         if crtf_present:  # CRTF
             weight_engine *= 1.1  # Based on EU project COBRA: https://cordis.europa.eu/project/id/605379/reporting
         if hex_area != 0:  # intercooler
             weight_engine += hex_area*0.001*4510*10  # titanium density = 4510 kg/m3, intercooler pipe thickness = 1 mm, pipes = 10% of installation
 
         # Get nacelle lengths and diameters
-        l_fancowl = Length(self.ops_metrics, self.architecture).length_calculation()[1]
-        l_gg = Length(self.ops_metrics, self.architecture).length_calculation()[3]
-        d_inlet = Diameter(self.ops_metrics, self.architecture).diameter_calculation()[0]
-        d_fan_outlet = Diameter(self.ops_metrics, self.architecture).diameter_calculation()[2]
-        d_gg_inlet = Diameter(self.ops_metrics, self.architecture).diameter_calculation()[3]
-        d_gg_outlet = Diameter(self.ops_metrics, self.architecture).diameter_calculation()[4]
+        l_nacelle, l_fancowl, _, l_gg, _ = Length(self.ops_metrics, self.architecture).length_calculation()
+        d_inlet, _, d_fan_outlet, d_gg_inlet, d_gg_outlet, _ = \
+            Diameter(self.ops_metrics, self.architecture).diameter_calculation(l_nacelle=l_nacelle)
 
         # Calculate nacelle weight based on Proesmans estimation
         area_fancowl = l_fancowl*pi*(d_inlet+d_fan_outlet)/2
@@ -148,21 +152,20 @@ class Length:
         fan_present, crtf_present, config, gear, massflow, bpr = self.check_architecture()
 
         # Define necessary parameters
-        t_atm = 288.15  # According to ISA atmosphere
-        rho_atm = 1.225  # According to ISA atmosphere
-        c_atm = sqrt(1.4*287.05*t_atm)
         cl, dl, phi = (12, 0, 1) if not fan_present else ((9.8, 0.05, 1) if config == 'mixed' else (7.8, 0.1, 0.625))
         beta = 0.21+0.12/sqrt(phi-0.3) if (fan_present and config == 'separate') else 0.35
 
         # Calculate nacelle length with Torenbeek & Berenschot equations
-        l_nacelle = cl*(sqrt(massflow/rho_atm/c_atm*(1+0.2*bpr)/(1+bpr))+dl)
+        l_nacelle = cl*(sqrt(massflow/RHO_ISA/C_ISA*(1+0.2*bpr)/(1+bpr))+dl)
 
         # Add length changes based on estimated component lengths, unless mentioned otherwise
         l_nacelle = l_nacelle*(0.85 if fan_present else 0.75)
-        if len(self.architecture.get_elements_by_type(Turbine)) != 2:  # No 2-shaft engine
-            l_nacelle *= 1.1**(len(self.architecture.get_elements_by_type(Turbine))-2)
-        if len(self.architecture.get_elements_by_type(Burner)) != 1:  # ITB
-            l_nacelle *= 1.1**(len(self.architecture.get_elements_by_type(Burner))-1)
+        n_turbines = len(self.architecture.get_elements_by_type(Turbine))
+        n_burners = len(self.architecture.get_elements_by_type(Burner))
+        if n_turbines != 2:  # No 2-shaft engine
+            l_nacelle *= 1.1**(n_turbines-2)
+        if n_burners != 1:  # ITB
+            l_nacelle *= 1.1**(n_burners-1)
         if crtf_present:  # CRTF
             l_nacelle *= 1.1  # Based on EU project COBRA: https://cordis.europa.eu/project/id/605379/reporting
 
@@ -203,22 +206,19 @@ class Diameter:
 
         return fan_present, config, massflow, area_inlet, bpr
 
-    def diameter_calculation(self):
+    def diameter_calculation(self, l_nacelle: float = None):
 
         fan_present, config, massflow, area_inlet, bpr = self.check_architecture()
-        l_nacelle = Length(self.ops_metrics, self.architecture).length_calculation()[0]
+        if l_nacelle is None:  # Can be provided if the nacelle length has already been calculated
+            l_nacelle = Length(self.ops_metrics, self.architecture).length_calculation()[0]
         phi = 1 if not fan_present else (1 if config == 'mixed' else 0.625)
-
-        # Define necessary parameters
-        t_atm = 288.15  # According to ISA atmosphere
-        rho_atm = 1.225  # According to ISA atmosphere
-        c_atm = sqrt(1.4*287.05*t_atm)
+        flow_factor = massflow/RHO_ISA/C_ISA*bpr
 
         # Calculate maximum diameter with TU Delft equation
         d_inlet = sqrt(4/pi*area_inlet)  # Nacelle inlet diameter
         d_max = (d_inlet + 0.06*phi*l_nacelle + 0.03)*(1.35 if fan_present and bpr > 1 else 1)  # Maximum nacelle diameter
         d_fan_outlet = d_max*(1-(1/3)*phi**2)  # Fan exit diameter
-        d_gg_inlet = d_fan_outlet*((0.089*massflow/rho_atm/c_atm*bpr+4.5)/(0.067*massflow/rho_atm/c_atm*bpr+5.8))**2  # Gas generator inlet diameter
+        d_gg_inlet = d_fan_outlet*((0.089*flow_factor+4.5)/(0.067*flow_factor+5.8))**2  # Gas generator inlet diameter
         d_gg_outlet = 0.55*d_gg_inlet  # Gas generator outlet diameter
         d_cone_inlet = 0.55*d_gg_outlet  # Cone inlet diameter --> estimation
 
@@ -291,11 +291,9 @@ class Noise:
         c_atm = sqrt(1.4*287.05*t_atm)
         rho_atm = p_atm/(287.05*t_atm)
         rho_jet = p_jet/(287.05*p_jet)
-        rho_isa = 1.225
-        c_isa = sqrt(1.4*287.05*288.15)
 
         # Calculate noise with Stone equation
-        OASPL_nozzle = 141 + 10*log10(area_jet*(rho_atm/rho_isa)**2*(c_atm/c_isa)**2) + \
+        OASPL_nozzle = 141 + 10*log10(area_jet*(rho_atm/RHO_ISA)**2*(c_atm/C_ISA)**2) + \
                        10*log10((v_jet/c_atm)**7.5/(1+0.01*(v_jet/c_atm)**4.5)) \
                        + 10*(3*(v_jet/c_atm)**3.5/(0.6+(v_jet/c_atm)**3.5)-1)*log10(rho_jet/rho_atm)
 
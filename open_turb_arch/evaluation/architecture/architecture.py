@@ -15,6 +15,7 @@ Copyright: (c) 2020, Deutsches Zentrum fuer Luft- und Raumfahrt e.V.
 Contact: jasper.bussemaker@dlr.de
 """
 
+import copy
 from typing import *
 import pycycle.api as pyc
 import openmdao.api as om
@@ -30,6 +31,9 @@ class ArchElement:
 
     name: str
 
+    # Fields only applied by set_problem_values: changing them does not require setting up the problem again
+    problem_value_fields: ClassVar[Tuple[str, ...]] = ()
+
     def __hash__(self):
         return id(self)
 
@@ -68,8 +72,58 @@ class TurbofanArchitecture:
 
     elements: List[ArchElement] = field(default_factory=list)
 
+    # Lazily filled mapping from queried type to its elements, reset by insert_element/remove_element
+    _type_index: Dict[type, List[ArchElement]] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _type_index_key: tuple = field(default=None, init=False, repr=False, compare=False)
+
+    @classmethod
+    def from_chain(cls, elements: List[ArchElement], shafts: List[ArchElement] = None) -> 'TurbofanArchitecture':
+        """Creates an architecture from a serial flow path: each element is set as the flow target of the element
+        before it. Shafts (and other elements outside of the flow path) are appended after the flow path."""
+        for element, target in zip(elements[:-1], elements[1:]):
+            element.target = target
+        return cls(elements=list(elements)+list(shafts or []))
+
     def get_elements_by_type(self, typ: Type[ArchElType]) -> List[ArchElType]:
-        return [el for el in self.elements if isinstance(el, typ)]
+        type_index = self._get_type_index()
+        if typ not in type_index:
+            type_index[typ] = [el for el in self.elements if isinstance(el, typ)]
+        return list(type_index[typ])
+
+    def clone(self) -> 'TurbofanArchitecture':
+        """Copies the architecture and its elements, redirecting references between elements (flow targets, shaft
+        connections, etc.) to the copied elements. Much cheaper than a deepcopy, as element values are immutable."""
+        cloned_elements = {id(el): copy.copy(el) for el in self.elements}
+
+        def _get_cloned_value(value):
+            if isinstance(value, ArchElement):
+                return cloned_elements.get(id(value), value)
+            if isinstance(value, list):
+                return [_get_cloned_value(val) for val in value]
+            return value
+
+        for cloned_element in cloned_elements.values():
+            el_dict = cloned_element.__dict__
+            for key in list(el_dict.keys()):
+                el_dict[key] = _get_cloned_value(el_dict[key])
+
+        return TurbofanArchitecture(elements=[cloned_elements[id(el)] for el in self.elements])
+
+    def insert_element(self, index: int, element: ArchElement):
+        self.elements.insert(index, element)
+        self._type_index = {}
+
+    def remove_element(self, element: ArchElement):
+        self.elements.remove(element)
+        self._type_index = {}
+
+    def _get_type_index(self) -> Dict[type, List[ArchElement]]:
+        # Also reset if the elements list has been replaced or resized directly
+        index_key = (id(self.elements), len(self.elements))
+        if self._type_index_key != index_key:
+            self._type_index = {}
+            self._type_index_key = index_key
+        return self._type_index
 
     def __eq__(self, other):
         return hash(self) == hash(other)
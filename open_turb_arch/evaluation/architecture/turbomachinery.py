@@ -68,6 +68,8 @@ class Compressor(BaseTurboMachinery):
     offtake_bleed: bool = None  # Compressor for extraction bleed offtake
     flow_out: str = None
 
+    problem_value_fields = ('pr', 'eff')
+
     def add_element(self, cycle: pyc.Cycle, thermo_data, design: bool) -> om.Group:
         if self.shaft is None:
             raise ValueError('Not connected to shaft: %r' % self)
@@ -149,6 +151,8 @@ class Turbine(BaseTurboMachinery):
     bleed_names: List[str] = field(default_factory=lambda: [])
     flow_out: str = None
 
+    problem_value_fields = ('eff',)
+
     def add_element(self, cycle: pyc.Cycle, thermo_data, design: bool) -> om.Group:
         if self.shaft is None:
             raise ValueError('Not connected to shaft: %r' % self)
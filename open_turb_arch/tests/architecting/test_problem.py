@@ -15,7 +15,9 @@ Copyright: (c) 2020, Deutsches Zentrum fuer Luft- und Raumfahrt e.V.
 Contact: jasper.bussemaker@dlr.de
 """
 
+import os
 import pytest
+import pickle
 import numpy as np
 from typing import *
 from dataclasses import dataclass
@@ -211,6 +213,28 @@ def test_problem(an_problem):
     assert all([isinstance(met, OutputMetric) for met in problem.opt_metrics])
 
 
+def test_correct_design_vector_matrix(an_problem):
+    problem = ArchitectingProblem(an_problem, choices=[DummyChoice()], objectives=[DummyMetric()])
+
+    lower, upper, is_discrete = problem.get_free_design_vector_bounds()
+    assert list(lower) == [5., 0., 0.]
+    assert list(upper) == [20., 2., 2.]
+    assert list(is_discrete) == [False, True, True]
+
+    x = np.array([
+        [4., .4, 1.6],
+        [12.3, 1.5, 2.7],
+        [25., -1., .2],
+    ])
+    x_corr = problem.correct_design_vector_matrix(x)
+    assert np.all(x_corr == np.array([
+        [5., 0., 2.],
+        [12.3, 2., 2.],
+        [20., 0., 0.],
+    ]))
+    assert x[0, 0] == 4.
+
+
 def test_design_vector(an_problem):
     problem = ArchitectingProblem(an_problem, choices=[DummyChoice()], objectives=[DummyMetric()])
     dv1: ContinuousDesignVariable
@@ -277,6 +301,12 @@ def test_generate_architecture(an_problem):
         assert len(is_active) == len(free_des_vector)
         assert np.all(is_active == [True, False, False])
 
+        architecture2, free_des_vector2 = problem.generate_architecture(dv)
+        assert architecture2 is not architecture
+        assert architecture2.get_elements_by_type(Compressor)[0].pr == dv[0]
+        assert free_des_vector2 == free_des_vector
+        assert np.all(problem.get_last_is_active() == is_active)
+
     n_dv = 0
     unique_dvs = set()
     for dv in problem.iter_design_vectors(n_cont=5):
@@ -324,6 +354,151 @@ def test_evaluate(an_problem):
         assert met == [.10*dv[0]]
 
         assert tuple(free_des_vector) in problem._results_cache
+        assert tuple(dv) in problem._dv_imputed_cache
+
+        assert problem.evaluate(dv) == (free_des_vector, obj, con, met)
+        assert problem.evaluate(np.array(dv)) == (free_des_vector, obj, con, met)
+        assert np.all(problem.get_last_is_active() == [True, False, False])
+
+    unpickled_problem = pickle.loads(pickle.dumps(problem))
+    assert len(problem._results_cache) > 0
+    assert len(unpickled_problem._results_cache) == 0
+    assert len(unpickled_problem.free_opt_des_vars) == len(problem.free_opt_des_vars)
+
+
+def test_evaluate_many(an_problem):
+    problem = ArchitectureProblemTester(
+        analysis_problem=an_problem,
+        choices=[DummyChoice()],
+        objectives=[DummyMetric()],
+    )
+
+    dvs = [problem.get_random_design_vector() for _ in range(20)]
+    evaluated_dvs = []
+    evaluate = problem.evaluate
+
+    def _evaluate(dv):
+        evaluated_dvs.append(list(dv))
+        return evaluate(dv)
+    problem.evaluate = _evaluate
+
+    results = problem.evaluate_many(dvs)
+    assert len(results) == len(dvs)
+    for i, dv in enumerate(dvs):
+        assert results[i][1] == [.10*dv[0]]
+
+    # Design vectors with the same discrete values are evaluated after each other
+    discrete_keys = [tuple(dv[1:]) for dv in evaluated_dvs]
+    assert discrete_keys == sorted(discrete_keys)
+
+    assert problem.evaluate_many(np.array(dvs)) == results
+
+    x = np.array(dvs, dtype=float)
+    x[:, 1:] += .2  # Discrete values are rounded
+    assert problem.evaluate_many(x) == results
+
+
+class PreFilterProblemTester(ArchitectureProblemTester):
+
+    def pre_filter(self, architecture: TurbofanArchitecture, imputed_design_vector: DesignVector) -> Optional[str]:
+        if architecture.get_elements_by_type(Compressor)[0].pr > 15.:
+            return 'Pressure ratio too high'
+
+    def evaluate_architecture(self, architecture: TurbofanArchitecture) -> Dict[OperatingCondition, OperatingMetrics]:
+        assert architecture.get_elements_by_type(Compressor)[0].pr <= 15.
+        return super(PreFilterProblemTester, self).evaluate_architecture(architecture)
+
+
+def test_pre_filter(an_problem):
+    problem = PreFilterProblemTester(
+        analysis_problem=an_problem,
+        choices=[DummyChoice()],
+        objectives=[DummyMetric()],
+        constraints=[DummyMetric(condition=an_problem.evaluate_conditions[0])],
+        metrics=[DummyMetric()],
+    )
+
+    _, obj, con, met = problem.evaluate([10., 0, 0])
+    assert obj == [1.]
+    assert con == [1.5]
+
+    _, obj, con, met = problem.evaluate([18., 0, 0])
+    assert obj == [np.inf]
+    assert con == [np.inf]
+    assert np.isnan(met[0])
+    assert (18., 0, 1) in problem._results_cache
+
+
+def test_results_cache_file(an_problem, tmpdir):
+    def _get_problem(objectives, choice=None, max_iter=30):
+        return ArchitectureProblemTester(analysis_problem=an_problem, choices=[choice or DummyChoice()],
+                                         objectives=objectives, max_iter=max_iter)
+
+    problem = _get_problem([DummyMetric()])
+    dvs = [problem.get_random_design_vector() for _ in range(10)]
+    results = problem.evaluate_many(dvs)
+
+    path = str(tmpdir.join('results_cache.pkl'))
+    assert not problem.load_results_cache(path)
+    problem.save_results_cache(path)
+
+    problem2 = _get_problem([DummyMetric()])
+    assert problem2.load_results_cache(path)
+    assert len(problem2._results_cache) == len(problem._results_cache)
+
+    def _evaluate_architecture(_):
+        raise RuntimeError('Result should have been loaded from the cache')
+    problem2.evaluate_architecture = _evaluate_architecture
+    assert problem2.evaluate_many(dvs) == results
+
+    # Results of other problem definitions and cache versions are not loaded
+    assert not _get_problem([DummyMetric(), DummyMetric()]).load_results_cache(path)
+    assert not _get_problem([DummyMetric(condition=an_problem.evaluate_conditions[0])]).load_results_cache(path)
+    assert not _get_problem([DummyMetric()], choice=DummyChoice(add_constraint=True)).load_results_cache(path)
+    assert not _get_problem([DummyMetric()], max_iter=40).load_results_cache(path)
+
+    tol = an_problem.design_condition.balancer.tol
+    an_problem.design_condition.balancer.tol = 1e-4
+    assert not _get_problem([DummyMetric()]).load_results_cache(path)
+    an_problem.design_condition.balancer.tol = tol
+
+    with open(path, 'rb') as fp:
+        data = pickle.load(fp)
+    data['key'] = (1,)+data['key'][1:]
+    with open(path, 'wb') as fp:
+        pickle.dump(data, fp)
+    assert not _get_problem([DummyMetric()]).load_results_cache(path)
+
+
+def test_finalize(an_problem):
+    problem = ArchitectureProblemTester(analysis_problem=an_problem, choices=[DummyChoice()], objectives=[DummyMetric()])
+    problem.evaluate(problem.get_random_design_vector())
+    assert len(problem._results_cache) == 1
+
+    problem._problem_cache.add(('dummy',), None)
+    problem.finalize()
+    assert len(problem._results_cache) == 0
+    assert len(problem._problem_cache) == 0
+
+
+def test_buffer_results(an_problem, tmpdir):
+    problem = ArchitectureProblemTester(
+        analysis_problem=an_problem,
+        choices=[DummyChoice()],
+        objectives=[DummyMetric()],
+        save_results_folder=str(tmpdir),
+        save_results_combined=True,
+    )
+    problem.results_buffer_size = 10
+
+    for dv1 in [6., 7., 8.]:
+        problem.evaluate([dv1, 0, 1])
+    assert len(os.listdir(str(tmpdir))) == 0
+
+    problem.finalize()
+    assert len(os.listdir(str(tmpdir))) == 4
+    with open(os.path.join(str(tmpdir), 'results_combined.txt'), 'r') as fp:
+        assert fp.read().count('imputed_design_vector') == 3
 
 
 def test_evaluate_architecture(an_problem):
@@ -348,6 +523,137 @@ def test_evaluate_architecture(an_problem):
     assert met == [pytest.approx(22.6075, abs=1e-1)]
 
 
+def test_warm_start(an_problem, monkeypatch):
+    import open_turb_arch.architecting.problem as problem_module
+    balancer = an_problem.design_condition.balancer
+    default_init_values = balancer.get_init_values()
+    init_values = []
+    problems = []
+    fail_run = False
+
+    class _Problem:
+
+        def __init__(self):
+            self.values = {}
+
+        def set_val(self, name, value, units=None):
+            self.values[name] = value
+
+    class _CycleBuilder:
+
+        def __init__(self, architecture, analysis_problem, max_iter=20, problem_cache=None):
+            self.analysis_problem = analysis_problem
+
+        def get_problem(self):
+            init_values.append(self.analysis_problem.design_condition.balancer.get_init_values())
+            problems.append(_Problem())
+            return problems[-1]
+
+        def run(self, _, print_solver=True):
+            if fail_run:
+                raise RuntimeError('Not converged')
+
+        def get_metrics(self, _):
+            return {}
+
+        def release_problem(self, _):
+            pass
+
+    monkeypatch.setattr(problem_module, 'CycleBuilder', _CycleBuilder)
+    converged_values = {'mass_flow': 25., 'turbine_prs': {'turbine': 3.5}}
+    balancer.get_converged_values = lambda *_: dict(converged_values)
+
+    problem = ArchitectingProblem(an_problem, choices=[DummyChoice()], objectives=[DummyMetric()])
+    architecture, _ = problem.generate_architecture([10., 0, 1])
+    topology_key = problem._get_topology_key(architecture)
+
+    # The converged values are stored for the topology
+    problem.evaluate_architecture(architecture)
+    assert init_values[0] == default_init_values
+    assert problems[0].values == {}
+    assert problem._warm_start_cache[topology_key] == converged_values
+    assert balancer.get_init_values() == default_init_values
+
+    # A next evaluation of the same topology starts from the converged values
+    converged_values = {'mass_flow': 26., 'turbine_prs': {'turbine': 3.6}}
+    architecture, _ = problem.generate_architecture([15., 0, 1])
+    problem.evaluate_architecture(architecture)
+    assert init_values[1]['mass_flow'] == 25.
+    assert init_values[1]['turbine_prs'] == {'turbine': 3.5}
+    assert init_values[1]['far'] == default_init_values['far']
+
+    # Also set as problem values, as a reused (already set-up) problem does not apply the initial guesses
+    assert problems[1].values['design.engine_balance.W'] == 25.
+    assert problems[1].values['design.engine_balance.turbine_PR'] == 3.5
+    assert problems[1].values['design.engine_balance.FAR'] == default_init_values['far']
+    assert problem._warm_start_cache[topology_key] == converged_values
+    assert balancer.get_init_values() == default_init_values
+
+    # Failed evaluations do not change the stored values
+    fail_run = True
+    with pytest.raises(RuntimeError):
+        problem.evaluate_architecture(architecture)
+    assert problem._warm_start_cache[topology_key] == {'mass_flow': 26., 'turbine_prs': {'turbine': 3.6}}
+    assert balancer.get_init_values() == default_init_values
+
+
+def test_loose_balancer_tolerance():
+    from open_turb_arch.tests.examples.simple_turbojet import get_architecting_problem
+
+    # A looser solver tolerance should not change the outputs by more than 0.01%
+    values = []
+    for tol in [1e-8, 1e-4]:
+        problem = get_architecting_problem()
+        problem.analysis_problem.design_condition.balancer.tol = tol
+        _, obj, _, met = problem.evaluate([0, 0, 0, 0, 0, 0, 0, 0, 0])
+        values.append(list(obj)+list(met))
+
+    assert values[1] == pytest.approx(values[0], rel=1e-4)
+
+
+@dataclass
+class CountingMetric(DummyMetric):
+
+    n_extract: int = 0
+
+    def extract_met(self, analysis_problem: AnalysisProblem, result: OperatingMetricsMap,
+                    architecture: TurbofanArchitecture) -> Sequence[float]:
+        self.n_extract += 1
+        return super(CountingMetric, self).extract_met(analysis_problem, result, architecture)
+
+
+@dataclass
+class SharedCountingMetric(CountingMetric):
+
+    extract_depends_on_limits = False
+
+
+def test_extract_metrics_once(an_problem):
+    metric = SharedCountingMetric()
+    od_metric = SharedCountingMetric(condition=an_problem.evaluate_conditions[0])
+    problem = ArchitectingProblem(
+        an_problem, choices=[DummyChoice()], objectives=[metric], constraints=[od_metric, metric], metrics=[metric])
+
+    results = {
+        an_problem.design_condition: OperatingMetrics(tsfc=1.),
+        an_problem.evaluate_conditions[0]: OperatingMetrics(tsfc=2.),
+    }
+    architecture, imputed_design_vector = problem.generate_architecture([10., 0, 1])
+    obj_values, con_values, met_values = problem.extract_metrics(architecture, imputed_design_vector, results)
+    assert obj_values == [1.]
+    assert con_values == [2., 1.]
+    assert met_values == [1.]
+
+    assert metric.n_extract == 1
+    assert od_metric.n_extract == 1
+
+    # By default values are extracted for each role
+    metric = CountingMetric()
+    problem = ArchitectingProblem(an_problem, choices=[DummyChoice()], objectives=[metric], metrics=[metric])
+    assert problem.extract_metrics(architecture, imputed_design_vector, results) == ([1.], [], [1.])
+    assert metric.n_extract == 2
+
+
 def test_choice_constraints(an_problem):
     problem = ArchitectingProblem(
         analysis_problem=AnalysisProblem(design_condition=an_problem.design_condition),
@@ -551,6 +857,40 @@ def test_pymoo_problem(an_problem):
     assert np.all(np.round(x1) == x1)
 
 
+def test_pymoo_eval_order(an_problem):
+    from pymoo.model.evaluator import Evaluator
+    from pymoo.operators.sampling.random_sampling import FloatRandomSampling
+
+    problem = ArchitectureProblemTester(
+        analysis_problem=an_problem,
+        choices=[DummyChoice()],
+        objectives=[DummyMetric()],
+    )
+    pymoo_problem = problem.get_pymoo_problem()
+
+    evaluated_dvs = []
+    evaluate = problem.evaluate
+
+    def _evaluate(dv):
+        evaluated_dvs.append(list(dv))
+        return evaluate(dv)
+    problem.evaluate = _evaluate
+
+    # Sampled discrete values are not rounded
+    pop = FloatRandomSampling().do(pymoo_problem, 50)
+    x = pop.get('X').copy()
+    assert not np.all(np.round(x[:, 1:]) == x[:, 1:])
+    Evaluator().eval(pymoo_problem, pop)
+
+    # Design vectors with the same discrete values are evaluated after each other
+    discrete_keys = [tuple(dv[1:]) for dv in evaluated_dvs]
+    assert discrete_keys == sorted(discrete_keys)
+    assert len(set(discrete_keys)) > 1
+
+    # Outputs are in the order of the population
+    assert np.all(pop.get('F')[:, 0] == .10*x[:, 0])
+
+
 def test_pymoo_parallel_eval(an_problem):
     import multiprocessing
     from pymoo.model.evaluator import Evaluator
@@ -600,3 +940,29 @@ def test_pymoo_parallel_eval(an_problem):
     pop_repaired = repair.do(pymoo_problem, pop)
     x1 = pop_repaired.get('X')[:, 1]
     assert np.all(np.round(x1) == x1)
+
+
+def test_pymoo_unordered_parallel_eval(an_problem):
+    import multiprocessing
+    from pymoo.model.evaluator import Evaluator
+    from pymoo.operators.sampling.random_sampling import FloatRandomSampling
+
+    problem = ArchitectureProblemTester(
+        analysis_problem=an_problem,
+        choices=[DummyChoice()],
+        objectives=[DummyMetric()],
+        constraints=[DummyMetric(condition=an_problem.evaluate_conditions[0])],
+        metrics=[DummyMetric()],
+    )
+
+    pymoo_problem = problem.get_pymoo_problem()
+    with multiprocessing.Pool(2) as pool:
+        pymoo_problem.parallelization = ('starmap', get_unordered_starmap(pool, chunksize=4))
+
+        pop = FloatRandomSampling().do(pymoo_problem, 100)
+        Evaluator().eval(pymoo_problem, pop)
+
+    x = pop.get('X')
+    dv1 = x[:, 0]
+    assert np.all(pop.get('F')[:, 0] == (.10*dv1))
+    assert np.all(pop.get('G')[:, 0] == (.15*dv1-.05))
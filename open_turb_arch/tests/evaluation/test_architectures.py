@@ -23,13 +23,30 @@ from open_turb_arch.evaluation.architecture import *
 @pytest.fixture
 def simple_turbojet_arch():
     inlet = Inlet(name='inlet', mach=.6, p_recovery=1)
-    inlet.target = compressor = Compressor(name='comp', map=CompressorMap.AXI_5, mach=.02, pr=13.5, eff=.83)
-    compressor.target = burner = Burner(name='burner', fuel=FuelType.JET_A, mach=.02, p_loss_frac=.03)
-    burner.target = turbine = Turbine(name='turb', map=TurbineMap.LPT_2269, mach=.4, eff=.86)
-    turbine.target = nozzle = Nozzle(name='nozzle_core', type=NozzleType.CD, v_loss_coefficient=.99)
+    compressor = Compressor(name='comp', map=CompressorMap.AXI_5, mach=.02, pr=13.5, eff=.83)
+    burner = Burner(name='burner', fuel=FuelType.JET_A, mach=.02, p_loss_frac=.03)
+    turbine = Turbine(name='turb', map=TurbineMap.LPT_2269, mach=.4, eff=.86)
+    nozzle = Nozzle(name='nozzle_core', type=NozzleType.CD, v_loss_coefficient=.99)
     shaft = Shaft(name='shaft', connections=[compressor, turbine], rpm_design=8070, power_loss=0.)
 
-    return TurbofanArchitecture(elements=[inlet, compressor, burner, turbine, nozzle, shaft])
+    return TurbofanArchitecture.from_chain([inlet, compressor, burner, turbine, nozzle], shafts=[shaft])
+
+
+def test_from_chain():
+    inlet = Inlet(name='inlet')
+    compressor = Compressor(name='comp')
+    burner = Burner(name='burner')
+    turbine = Turbine(name='turb')
+    nozzle = Nozzle(name='nozzle_core')
+    shaft = Shaft(name='shaft', connections=[compressor, turbine])
+
+    architecture = TurbofanArchitecture.from_chain([inlet, compressor, burner, turbine, nozzle], shafts=[shaft])
+    assert architecture.elements == [inlet, compressor, burner, turbine, nozzle, shaft]
+    assert inlet.target is compressor
+    assert compressor.target is burner
+    assert burner.target is turbine
+    assert turbine.target is nozzle
+    assert nozzle.target is None
 
 
 def test_simple_turbojet(simple_turbojet_arch: TurbofanArchitecture):
@@ -57,6 +74,169 @@ def test_simple_turbojet(simple_turbojet_arch: TurbofanArchitecture):
     assert met.opr == pytest.approx(13.5)
 
 
+def test_metrics_cached(simple_turbojet_arch: TurbofanArchitecture):
+    design_condition = DesignCondition(
+        mach=1e-6, alt=0, thrust=20017, turbine_in_temp=1314, balancer=DesignBalancer(init_turbine_pr=2.9))
+    b = CycleBuilder(architecture=simple_turbojet_arch, problem=AnalysisProblem(design_condition=design_condition))
+    prob = b.get_problem()
+    b.run(prob, print_solver=False)
+
+    met = b.get_metrics(prob)[design_condition]
+    assert b.get_metrics(prob)[design_condition] is met
+
+
+def test_design_balancer_converged_values(simple_turbojet_arch: TurbofanArchitecture):
+    design_condition = DesignCondition(
+        mach=1e-6, alt=0, thrust=20017, turbine_in_temp=1314, balancer=DesignBalancer(init_turbine_pr=2.9))
+    b = CycleBuilder(architecture=simple_turbojet_arch, problem=AnalysisProblem(design_condition=design_condition))
+    prob = b.get_problem()
+    b.run(prob, print_solver=False)
+    met = b.get_metrics(prob)[design_condition]
+
+    converged_values = design_condition.balancer.get_converged_values(prob, design_condition.name, simple_turbojet_arch)
+    assert converged_values['mass_flow'] == pytest.approx(met.mass_flow)
+    assert 'gearbox_torque' not in converged_values
+    assert set(converged_values['turbine_prs']) == {'turb'}
+
+
+def test_problem_cache(simple_turbojet_arch: TurbofanArchitecture):
+    architecture = simple_turbojet_arch.clone()  # Modified below, the unmodified architecture is used for b5
+    cache = ProblemCache()
+    design_condition = DesignCondition(
+        mach=1e-6, alt=0,
+        thrust=20017,  # 4500 lbf
+        turbine_in_temp=1314,  # 2857 degR
+        balancer=DesignBalancer(init_turbine_pr=2.9),
+    )
+    analysis_problem = AnalysisProblem(design_condition=design_condition)
+
+    b = CycleBuilder(architecture=architecture, problem=analysis_problem, problem_cache=cache)
+    prob = b.get_problem()
+    b.run(prob, print_solver=False)
+    tsfc = b.get_metrics(prob)[design_condition].tsfc
+
+    # Only released problems are reused
+    assert len(cache) == 0
+    b.release_problem(prob)
+    assert len(cache) == 1
+
+    b2 = CycleBuilder(architecture=architecture, problem=analysis_problem, problem_cache=cache)
+    prob2 = b2.get_problem()
+    assert prob2 is prob
+    assert len(cache) == 0
+    b2.run(prob2, print_solver=False)
+    assert b2.get_metrics(prob2)[design_condition].tsfc == pytest.approx(tsfc, rel=1e-6)
+    b2.release_problem(prob2)
+
+    # Values set after setup (compressor pressure ratio) and equal conditions reuse the problem
+    architecture.get_elements_by_type(Compressor)[0].pr = 15.
+    design_condition2 = DesignCondition(
+        mach=1e-6, alt=0, thrust=20017, turbine_in_temp=1314, balancer=DesignBalancer(init_turbine_pr=2.9))
+    b3 = CycleBuilder(
+        architecture=architecture, problem=AnalysisProblem(design_condition=design_condition2), problem_cache=cache)
+    prob3 = b3.get_problem()
+    assert prob3 is prob
+    b3.run(prob3, print_solver=False)
+    met3 = b3.get_metrics(prob3)[design_condition2]
+    assert met3.opr == pytest.approx(15.)
+    assert met3.tsfc != pytest.approx(tsfc, rel=1e-6)
+    assert b.get_metrics(prob)[design_condition].opr == pytest.approx(15.)  # Not the metrics of its own run
+    b3.release_problem(prob3)
+
+    # Setup parameters and different conditions do not
+    architecture.get_elements_by_type(Burner)[0].p_loss_frac = .04
+    b4 = CycleBuilder(
+        architecture=architecture, problem=AnalysisProblem(design_condition=design_condition2), problem_cache=cache)
+    assert b4.get_problem() is not prob
+
+    design_condition2.thrust = 22000
+    b5 = CycleBuilder(
+        architecture=simple_turbojet_arch, problem=AnalysisProblem(design_condition=design_condition2),
+        problem_cache=cache)
+    assert b5.get_problem() is not prob
+
+    # Without a cache, problems are never reused
+    b6 = CycleBuilder(architecture=architecture, problem=analysis_problem)
+    prob6 = b6.get_problem()
+    b6.run(prob6, print_solver=False)
+    b6.release_problem(prob6)
+    assert CycleBuilder(architecture=architecture, problem=analysis_problem).get_problem() is not prob6
+
+
+def test_design_balancer_init_values():
+    balancer = DesignBalancer(init_turbine_pr=2.9)
+    assert balancer.get_init_values()['turbine_pr'] == 2.9
+
+    balancer.set_init_values(turbine_pr=3.5, mass_flow=20., turbine_prs={'hpt': 4.5, 'lpt': 6.})
+    init_values = balancer.get_init_values()
+    assert init_values['turbine_pr'] == 3.5
+    assert init_values['turbine_prs'] == {'hpt': 4.5, 'lpt': 6.}
+    assert init_values['mass_flow'] == 20.
+
+    with pytest.raises(ValueError):
+        balancer.set_init_values(bpr=5.)
+
+
+def test_balancer_tolerance(simple_turbojet_arch: TurbofanArchitecture):
+    assert DesignBalancer().tol == 1e-8
+    assert OffDesignBalancer(tol=1e-4).tol == 1e-4
+
+    design_condition = DesignCondition(
+        mach=1e-6, alt=0,
+        thrust=20017,  # 4500 lbf
+        turbine_in_temp=1314,  # 2857 degR
+        balancer=DesignBalancer(init_turbine_pr=2.9, tol=1e-4),
+    )
+    b = CycleBuilder(architecture=simple_turbojet_arch, problem=AnalysisProblem(design_condition=design_condition))
+    prob = b.get_problem()
+
+    newton = prob.model._get_subsystem(design_condition.name).nonlinear_solver
+    assert newton.options['atol'] == 1e-4
+    assert newton.options['rtol'] == 1e-4
+
+
+def test_elements_by_type(simple_turbojet_arch: TurbofanArchitecture):
+    assert [el.name for el in simple_turbojet_arch.get_elements_by_type(Compressor)] == ['comp']
+    assert [el.name for el in simple_turbojet_arch.get_elements_by_type(Turbine)] == ['turb']
+
+    compressor = simple_turbojet_arch.get_elements_by_type(Compressor)[0]
+    lpc = Compressor(name='lpc', map=CompressorMap.AXI_5, mach=.02, pr=2., eff=.83)
+    simple_turbojet_arch.insert_element(simple_turbojet_arch.elements.index(compressor), lpc)
+    assert [el.name for el in simple_turbojet_arch.get_elements_by_type(Compressor)] == ['lpc', 'comp']
+
+    simple_turbojet_arch.remove_element(lpc)
+    assert simple_turbojet_arch.get_elements_by_type(Compressor) == [compressor]
+
+    simple_turbojet_arch.elements.append(lpc)
+    assert simple_turbojet_arch.get_elements_by_type(Compressor) == [compressor, lpc]
+
+
+def test_clone(simple_turbofan_arch: TurbofanArchitecture):
+    architecture = simple_turbofan_arch.clone()
+    assert len(architecture.elements) == len(simple_turbofan_arch.elements)
+    for el, el_orig in zip(architecture.elements, simple_turbofan_arch.elements):
+        assert el is not el_orig
+        assert type(el) == type(el_orig)
+        assert el.name == el_orig.name
+
+    element_ids = {id(el) for el in architecture.elements}
+    splitter = architecture.get_elements_by_type(Splitter)[0]
+    assert id(splitter.target_core) in element_ids
+    assert id(splitter.target_bypass) in element_ids
+
+    for shaft in architecture.get_elements_by_type(Shaft):
+        for conn in shaft.connections:
+            assert id(conn) in element_ids
+            assert conn.shaft is shaft
+
+    fan = [el for el in architecture.get_elements_by_type(Compressor) if el.name == 'fan'][0]
+    fan.pr = 2.
+    fan.bleed_names.append('bleed')
+    fan_orig = [el for el in simple_turbofan_arch.get_elements_by_type(Compressor) if el.name == 'fan'][0]
+    assert fan_orig.pr == 1.5
+    assert fan_orig.bleed_names == []
+
+
 def test_off_design_point(simple_turbojet_arch: TurbofanArchitecture):
     design_condition = DesignCondition(
         mach=1e-6, alt=0,
@@ -0,0 +1,106 @@
+"""
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Copyright: (c) 2020, Deutsches Zentrum fuer Luft- und Raumfahrt e.V.
+Contact: jasper.bussemaker@dlr.de
+
+
+Definitions shared by the example scripts.
+"""
+
+import os
+import multiprocessing
+from open_turb_arch.architecting.metrics import TSFCMetric, WeightMetric, LengthMetric, DiameterMetric, NOxMetric, \
+    NoiseMetric, JetMachMetric
+
+__all__ = ['get_output_metrics', 'evaluate_design_vector', 'get_pool', 'evaluate_parallel']
+
+
+def get_output_metrics():
+    """All available metrics, reported as output metrics of the evaluated architectures."""
+    return [
+        TSFCMetric(),
+        WeightMetric(),
+        LengthMetric(),
+        DiameterMetric(),
+        NOxMetric(),
+        NoiseMetric(),
+        JetMachMetric(),
+    ]
+
+
+def evaluate_design_vector(architecting_problem, design_vector, max_iter=30):
+    """Evaluates one design vector, printing the analysis results and writing the N2 diagram."""
+    architecting_problem.print_results = True
+    architecting_problem.view_n2 = True
+    architecting_problem._max_iter = max_iter
+
+    design_vector, objectives, constraints, metrics = architecting_problem.evaluate(design_vector)
+
+    print('\n'.join([
+        'Design vector: %r' % design_vector,
+        'Objectives: %r' % objectives,
+        'Constraints: %r' % constraints,
+        'Metrics: %r' % metrics,
+    ]))
+
+
+def get_pool(processes=3, max_tasks_per_child=50, initializer=None, initargs=()):
+    """Pool of worker processes for parallel evaluation."""
+    # Workers inherit the environment of the fork server, which is started (and imports OpenMDAO) when the pool is
+    # created: suppress the OpenMDAO MPI import warnings before that
+    os.environ['OPENMDAO_REQUIRE_MPI'] = 'false'
+
+    # Fresh worker processes (instead of forking the main process) avoid copying OpenMDAO/solver state and threads,
+    # and restarting them periodically bounds the memory that accumulates over many evaluations
+    start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    ctx = multiprocessing.get_context(start_method)
+    if start_method == 'forkserver':
+        # Import the analysis code (incl. the pyCycle compressor/turbine maps and thermo tables) once in the fork server,
+        # so that workers share it instead of each importing it again
+        ctx.set_forkserver_preload(['openmdao.api', 'pycycle.api', 'open_turb_arch.architecting.problem'])
+    return ctx.Pool(processes=processes, maxtasksperchild=max_tasks_per_child,
+                    initializer=initializer, initargs=initargs)
+
+
+_worker_problem = None
+
+
+def _worker_init(architecting_problem):
+    global _worker_problem
+    _worker_problem = architecting_problem
+
+
+def _evaluate_batch(batch):
+    indices, design_vectors = batch
+    return indices, _worker_problem.evaluate_many(design_vectors)
+
+
+def evaluate_parallel(architecting_problem, design_vectors, processes=3, batch_size=8):
+    """Evaluates design vectors in worker processes, yielding (index of the design vector, result) as soon as they are
+    available. Design vectors are sorted by their discrete values and sent in small batches, so that a batch mostly
+    shares its architecture topology (see `ArchitectingProblem.evaluate_many`), while slow evaluations do not hold up
+    the other workers."""
+    _, _, is_discrete = architecting_problem.get_free_design_vector_bounds()
+    i_discrete = [i for i, is_dis in enumerate(is_discrete) if is_dis]
+    i_sorted = sorted(range(len(design_vectors)), key=lambda i_dv: [design_vectors[i_dv][i] for i in i_discrete])
+    batches = [(indices, [design_vectors[i_dv] for i_dv in indices])
+               for indices in [i_sorted[i:i+batch_size] for i in range(0, len(i_sorted), batch_size)]]
+    if len(batches) == 0:
+        return
+
+    # The problem is sent to each worker once, instead of with every batch
+    with get_pool(processes=min(len(batches), processes), initializer=_worker_init,
+                  initargs=(architecting_problem,)) as pool:
+        for indices, results in pool.imap_unordered(_evaluate_batch, batches):
+            yield from zip(indices, results)
@@ -23,17 +23,20 @@ NOx and jet Mach number).
 import os
 import time
 import pickle
-import multiprocessing
 
 os.environ['OPENMDAO_REQUIRE_MPI'] = 'false'  # Suppress OpenMDAO MPI import warnings
 
 from open_turb_arch.architecting.architecting_problem import get_architecting_problem, get_pymoo_architecting_problem
+from open_turb_arch.tests.examples._common import get_pool
 
-from pymoo.optimize import minimize
-from pymoo.algorithms.nsga2 import NSGA2
-from pymoo.operators.sampling.latin_hypercube_sampling import LatinHypercubeSampling
 
 if __name__ == '__main__':
+    # Optimization imports are only needed when running the optimization, not when importing the problem definition
+    from open_turb_arch.architecting.pymoo import get_unordered_starmap
+    from pymoo.optimize import minimize
+    from pymoo.algorithms.nsga2 import NSGA2
+    from pymoo.operators.sampling.latin_hypercube_sampling import LatinHypercubeSampling
+
     architecting_problem = get_architecting_problem()
 
     architecting_problem.print_results = True
@@ -43,10 +46,10 @@ if __name__ == '__main__':
     architecting_problem.save_results_combined = True
 
     # The number of processes to be used
-    with multiprocessing.Pool(3) as pool:
+    with get_pool(processes=3) as pool:
         t = time.time()
         problem = get_pymoo_architecting_problem(architecting_problem)
-        problem.parallelization = ('starmap', pool.starmap)
+        problem.parallelization = ('starmap', get_unordered_starmap(pool, chunksize=8))
 
         algorithm = NSGA2(
             pop_size=205,
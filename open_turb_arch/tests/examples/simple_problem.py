@@ -22,19 +22,15 @@ Simple architecting problem: only contains existing engine architectures,
 import os
 import time
 import pickle
-import multiprocessing
 
 os.environ['OPENMDAO_REQUIRE_MPI'] = 'false'  # Suppress OpenMDAO MPI import warnings
 
-from open_turb_arch.architecting import *
-from open_turb_arch.architecting.metrics import *
-from open_turb_arch.architecting.turbofan import *
-from open_turb_arch.evaluation.analysis import *
-
-from open_turb_arch.architecting.pymoo import *
-from pymoo.optimize import minimize
-from pymoo.algorithms.nsga2 import NSGA2
-from pymoo.operators.sampling.latin_hypercube_sampling import LatinHypercubeSampling
+from open_turb_arch.architecting import ArchitectingProblem
+from open_turb_arch.architecting.metrics import TSFCMetric, JetMachMetric
+from open_turb_arch.architecting.turbofan import FanChoice, ShaftChoice, GearboxChoice, NozzleMixingChoice, \
+    OfftakesChoice
+from open_turb_arch.evaluation.analysis import AnalysisProblem, DesignCondition, DesignBalancer
+from open_turb_arch.tests.examples._common import get_output_metrics, get_pool
 
 
 def get_architecting_problem():
@@ -65,23 +61,22 @@ def get_architecting_problem():
         constraints=[
             JetMachMetric(max_jet_mn=1.),
         ],
-        metrics=[
-            TSFCMetric(),
-            WeightMetric(),
-            LengthMetric(),
-            DiameterMetric(),
-            NOxMetric(),
-            NoiseMetric(),
-            JetMachMetric(),
-        ],
+        metrics=get_output_metrics(),
     )
 
 
 def get_pymoo_architecting_problem():
+    from open_turb_arch.architecting.pymoo import PymooArchitectingProblem
     return PymooArchitectingProblem(get_architecting_problem())
 
 
 if __name__ == '__main__':
+    # Optimization imports are only needed when running the optimization, not when importing the problem definition
+    from open_turb_arch.architecting.pymoo import get_unordered_starmap
+    from pymoo.optimize import minimize
+    from pymoo.algorithms.nsga2 import NSGA2
+    from pymoo.operators.sampling.latin_hypercube_sampling import LatinHypercubeSampling
+
     architecting_problem = get_architecting_problem()
 
     architecting_problem.print_results = True
@@ -91,10 +86,10 @@ if __name__ == '__main__':
     architecting_problem.save_results_combined = True
 
     # The number of processes to be used
-    with multiprocessing.Pool(3) as pool:
+    with get_pool(processes=3) as pool:
         t = time.time()
-        problem = PymooArchitectingProblem(architecting_problem)
-        problem.parallelization = ('starmap', pool.starmap)
+        problem = architecting_problem.get_pymoo_problem()
+        problem.parallelization = ('starmap', get_unordered_starmap(pool, chunksize=8))
 
         algorithm = NSGA2(
             pop_size=75,
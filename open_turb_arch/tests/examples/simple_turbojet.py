@@ -18,10 +18,11 @@ Simple turbojet example based on pycycle.example_cycles.simple_turbojet
 """
 
 
-from open_turb_arch.architecting import *
-from open_turb_arch.architecting.metrics import *
-from open_turb_arch.architecting.turbofan import *
-from open_turb_arch.evaluation.analysis import *
+from open_turb_arch.architecting import ArchitectingProblem
+from open_turb_arch.architecting.metrics import TSFCMetric
+from open_turb_arch.architecting.turbofan import FanChoice, ShaftChoice, OfftakesChoice
+from open_turb_arch.evaluation.analysis import AnalysisProblem, DesignCondition, DesignBalancer
+from open_turb_arch.tests.examples._common import get_output_metrics, evaluate_design_vector
 
 
 def get_architecting_problem():
@@ -48,29 +49,10 @@ def get_architecting_problem():
             TSFCMetric(),
         ],
         constraints=[],
-        metrics=[
-            TSFCMetric(),
-            WeightMetric(),
-            LengthMetric(),
-            DiameterMetric(),
-            NOxMetric(),
-            NoiseMetric(),
-            JetMachMetric(),
-        ],
+        metrics=get_output_metrics(),
     )
 
 
 if __name__ == '__main__':
-
-    architecting_problem = get_architecting_problem()
-    architecting_problem.print_results = True
-    architecting_problem._max_iter = 30
-
     dv = [0, 0, 0, 0, 0, 0, 0, 0, 0]
-    architecture, imputed_dv = architecting_problem.generate_architecture(dv)
-    design_vector, objectives, constraints, metrics = architecting_problem.evaluate(dv)
-
-    print('Design vector: %r' % design_vector)
-    print('Objectives: %r' % objectives)
-    print('Constraints: %r' % constraints)
-    print('Metrics: %r' % metrics)
+    evaluate_design_vector(get_architecting_problem(), dv)
@@ -18,19 +18,14 @@ Contact: jasper.bussemaker@dlr.de
 import os
 
 if __name__ == '__main__':
-    from open_turb_arch.architecting import *
-    from open_turb_arch.architecting.metrics import *
-    from open_turb_arch.architecting.turbofan import *
-    from open_turb_arch.evaluation.analysis import *
-
-    import time
-    from open_turb_arch.architecting.pymoo import *
-    from pymoo.optimize import minimize
-    from pymoo.algorithms.nsga2 import NSGA2
-    from pymoo.operators.sampling.latin_hypercube_sampling import LatinHypercubeSampling
-    from pymoo.model.evaluator import Evaluator
-    from pymoo.visualization.scatter import Scatter
-    import multiprocessing
+    import numpy as np
+    from open_turb_arch.architecting import ArchitectingProblem
+    from open_turb_arch.architecting.metrics import TSFCMetric, WeightMetric, LengthMetric, DiameterMetric, NOxMetric, \
+        NoiseMetric, JetMachMetric
+    from open_turb_arch.architecting.turbofan import FanChoice, CRTFChoice, ShaftChoice, GearboxChoice, \
+        NozzleMixingChoice, OfftakesChoice, IntercoolerChoice
+    from open_turb_arch.evaluation.analysis import AnalysisProblem, DesignCondition, DesignBalancer
+    from open_turb_arch.tests.examples._common import get_output_metrics, evaluate_parallel
 
     analysis_problem = AnalysisProblem(
         design_condition=DesignCondition(
@@ -58,6 +53,8 @@ if __name__ == '__main__':
         # ],
     )
 
+    # All metrics are objectives as well as output metrics: the same (unparameterized) instances are used for both
+    output_metrics = get_output_metrics()
     architecting_problem = ArchitectingProblem(
         analysis_problem=analysis_problem,
         choices=[
@@ -73,15 +70,7 @@ if __name__ == '__main__':
             OfftakesChoice(),
             IntercoolerChoice(fix_include_ic=True),
         ],
-        objectives=[
-            TSFCMetric(),
-            WeightMetric(),
-            LengthMetric(),
-            DiameterMetric(),
-            NOxMetric(),
-            NoiseMetric(),
-            JetMachMetric(),
-        ],
+        objectives=output_metrics,
         constraints=[
             TSFCMetric(max_tsfc=20),
             WeightMetric(max_weight=10000),
@@ -91,15 +80,7 @@ if __name__ == '__main__':
             NoiseMetric(max_noise=130),
             JetMachMetric(max_jet_mn=1.),
         ],
-        metrics=[
-            TSFCMetric(),
-            WeightMetric(),
-            LengthMetric(),
-            DiameterMetric(),
-            NOxMetric(),
-            NoiseMetric(),
-            JetMachMetric(),
-        ],
+        metrics=output_metrics,
     )
 
     architecting_problem.print_results = True
@@ -108,18 +89,27 @@ if __name__ == '__main__':
     # architecting_problem.save_results_folder = 'C:\\Users\\thiba\\OneDrive\\Documenten\\TU DELFT\\MSc 1\\Thesis\\3. Execution\\Results\\Test'
     # architecting_problem.save_results_combined = True
     #
-    # # The number of processes to be used
-    # pool = multiprocessing.Pool(3)
+    # import time
+    # from open_turb_arch.architecting.pymoo import PymooArchitectingProblem, get_unordered_starmap
+    # from open_turb_arch.tests.examples._common import get_pool
+    # from pymoo.optimize import minimize
+    # from pymoo.algorithms.nsga2 import NSGA2
+    # from pymoo.operators.sampling.latin_hypercube_sampling import LatinHypercubeSampling
+    # from pymoo.model.evaluator import Evaluator
+    # from pymoo.visualization.scatter import Scatter
     #
-    # t = time.time()
-    # problem = PymooArchitectingProblem(architecting_problem)
-    # problem.parallelization = ('starmap', pool.starmap)
-    # pop = LatinHypercubeSampling().do(problem, 240)  # 240
-    # algorithm = NSGA2(pop_size=240, sampling=LatinHypercubeSampling())  # 240
-    # Evaluator().eval(problem, pop)
-    # result = minimize(problem, algorithm, termination=('n_eval', 3000), verbose=True)  # 3000
-    # elapsed = time.time() - t
-    # pool.close()
+    # # The number of processes to be used
+    # use_unordered_starmap = True  # False: pool.starmap, for comparison
+    # with get_pool(processes=3) as pool:
+    #     t = time.time()
+    #     problem = PymooArchitectingProblem(architecting_problem)
+    #     problem.parallelization = \
+    #         ('starmap', get_unordered_starmap(pool, chunksize=8) if use_unordered_starmap else pool.starmap)
+    #     pop = LatinHypercubeSampling().do(problem, 240)  # 240
+    #     Evaluator().eval(problem, pop)
+    #     algorithm = NSGA2(pop_size=240, sampling=pop)  # Start from the evaluated sample, instead of sampling again
+    #     result = minimize(problem, algorithm, termination=('n_eval', 3000), verbose=True)  # 3000
+    #     elapsed = time.time() - t
     #
     # os.makedirs(architecting_problem.save_results_folder, exist_ok=True)
     # path = os.path.join(architecting_problem.save_results_folder, 'results_pymoo.txt')
@@ -139,39 +129,44 @@ if __name__ == '__main__':
     # except:
     #     print('Error')
 
-    n_dv = 0
-    n_errors = 0
-    length = 0
-    unique_dvs = set()
-    arch_dvs = []
-    metrics_dvs = []
-    for dv in architecting_problem.iter_design_vectors(n_cont=1):
-        n_dv += 1
-        print('Design vector (input): %r' % dv)
-        architecture, imputed_dv = architecting_problem.generate_architecture(dv)
-        print('Architecture: %r' % architecture)
-        print('Imputed design vector: %r' % imputed_dv)
-        print('Number of design vectors: %d' % n_dv)
-        # try:
-        design_vector, objectives, constraints, metrics = architecting_problem.evaluate(dv)
-        unique_dvs.add(tuple(imputed_dv))
-        print('Metrics: %r' % metrics)
-        if length < len(unique_dvs):
-            arch_dvs.append(tuple(imputed_dv))
-            metrics_dvs.append(tuple(metrics))
-        length = len(unique_dvs)
-        # except:
-        #     print('Error')
-        #     n_errors += 1
-        print('Number of unique design vectors: %d' % len(unique_dvs))
-        print()
-        print('Unique design vectors: %r' % unique_dvs)
-        print('Architecture design vectors: %r' % arch_dvs)
-        print('Metrics design vectors: %r' % metrics_dvs)
-        print('Number of errors: %d' % n_errors)
-        print()
-        break
-    print('Unique design vectors %r:' % unique_dvs)
-    print('Architecture design vectors: %r' % arch_dvs)
-    print('Metrics design vectors: %r' % metrics_dvs)
-    print('Number of errors: %d' % n_errors)
+    design_vectors = list(architecting_problem.iter_design_vectors(n_cont=1))
+    results = evaluate_parallel(architecting_problem, design_vectors, processes=3)  # In order of completion
+
+    n_errors = n_rejected = 0
+    unique_dvs = {}  # Imputed design vector --> row in arch_dvs and metrics_dvs
+    arch_dvs = np.empty((len(design_vectors), len(architecting_problem.free_opt_des_vars)))
+    metrics_dvs = np.empty((len(design_vectors), len(architecting_problem.opt_metrics)))
+    lines = []  # Printed at once after the sweep
+    for n_dv, (i_dv, (imputed_dv, objectives, constraints, metrics)) in enumerate(results):
+        dv = design_vectors[i_dv]
+        if np.all(np.isinf(objectives)):  # Architectures rejected by the pre-filter yield infinite objectives
+            n_rejected += 1
+        elif np.any(np.isnan(metrics)):  # Failed evaluations yield NaN values
+            n_errors += 1
+        imputed_dv = tuple(imputed_dv)
+        is_new = imputed_dv not in unique_dvs
+        if is_new:
+            i_unique = unique_dvs[imputed_dv] = len(unique_dvs)
+            arch_dvs[i_unique, :] = imputed_dv
+            metrics_dvs[i_unique, :] = metrics
+
+        # Only report this design vector and running counts: the complete sets are printed once after the sweep
+        lines += [
+            'Design vector (input): %r' % dv,
+            'Imputed design vector: %r%s' % (imputed_dv, ' (new)' if is_new else ''),
+            'Number of design vectors: %d' % (n_dv+1),
+            'Metrics: %r' % metrics,
+            'Number of unique design vectors: %d' % len(unique_dvs),
+            'Number of rejected architectures: %d' % n_rejected,
+            'Number of errors: %d' % n_errors,
+            '',
+        ]
+    arch_dvs, metrics_dvs = arch_dvs[:len(unique_dvs), :], metrics_dvs[:len(unique_dvs), :]
+    lines += [
+        'Unique design vectors %r:' % set(unique_dvs),
+        'Architecture design vectors: %r' % arch_dvs,
+        'Metrics design vectors: %r' % metrics_dvs,
+        'Number of rejected architectures: %d' % n_rejected,
+        'Number of errors: %d' % n_errors,
+    ]
+    print('\n'.join(lines))